@@ -0,0 +1,51 @@
+"""
+Microbenchmark: per-element utility formatters vs the column-level ones in formatters.py.
+
+Run from the repo root:
+    python -m benchmarks.bench_formatters
+"""
+import timeit
+import numpy as np
+
+from commands.helpers.utility import format_percentage, format_large_num
+from commands.helpers.formatters import format_percentage_col, format_large_num_col
+
+SIZES = [500, 5_000, 50_000]   # one S&P scan, a large universe, many refreshes
+REPEAT = 5
+
+
+def make_data(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pct = rng.normal(0, 0.02, n)
+    # market caps/volumes spread over every magnitude bucket
+    nums = 10 ** rng.uniform(2, 13, n)
+    # a few missing values like a real scan has
+    pct[::97] = np.nan
+    nums[::89] = np.nan
+    return pct, nums
+
+
+def scalar(pct, nums):
+    return ([format_percentage(v) for v in pct],
+            [format_large_num(v) for v in nums])
+
+
+def vectorized(pct, nums):
+    return format_percentage_col(pct), format_large_num_col(nums)
+
+
+def best_of(fn, *args) -> float:
+    return min(timeit.repeat(lambda: fn(*args), number=1, repeat=REPEAT))
+
+
+def main():
+    print(f"{'rows':>8} {'scalar ms':>10} {'vector ms':>10} {'speedup':>8}")
+    for n in SIZES:
+        pct, nums = make_data(n)
+        t_scalar = best_of(scalar, pct, nums)
+        t_vector = best_of(vectorized, pct, nums)
+        print(f"{n:>8} {t_scalar * 1e3:>10.2f} {t_vector * 1e3:>10.2f} {t_scalar / t_vector:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
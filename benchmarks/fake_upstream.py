@@ -0,0 +1,130 @@
+"""
+Local stand-in for yfinance and FRED that replays a fixture (see fixtures.py).
+
+    with offline(fixture, latency=0.2, error_rate=0.01):
+        getGainers(tickers)
+
+patches yfinance.download, yfinance.Ticker and pandas_datareader's DataReader
+for the duration of the block. Every call sleeps `latency` seconds, and each
+symbol fails with probability `error_rate` (NaN columns from download, an
+exception from Ticker), which is how the real endpoints misbehave.
+"""
+import time
+import random
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import yfinance
+import pandas_datareader.data as web
+
+
+class FakeUpstream:
+    def __init__(self, fixture: dict, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.fixture = fixture
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {"download": 0, "ticker": 0, "fred": 0}
+
+    def _delay(self, kind: str):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _fails(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    # yfinance.download
+    def download(self, tickers, period="1d", interval="1m", **kwargs):
+        self._delay("download")
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        source = self.fixture["intraday"] if interval == "1m" else self.fixture["daily"]
+        fields = list(dict.fromkeys(source.columns.get_level_values(0)))
+        cols = pd.MultiIndex.from_product([fields, tickers], names=source.columns.names)
+        out = source.reindex(columns=cols)
+        for t in tickers:
+            if self._fails():
+                out.loc[:, (slice(None), t)] = np.nan
+        return out
+
+    # yfinance.Ticker
+    def ticker(self, symbol):
+        self._delay("ticker")
+        return FakeTicker(self, symbol)
+
+    # pandas_datareader.data.DataReader
+    def data_reader(self, name, source, start=None, end=None, **kwargs):
+        self._delay("fred")
+        if self._fails():
+            raise ConnectionError("simulated FRED outage")
+        df = self.fixture["fred"][name]
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        return df.copy()
+
+
+class FakeTicker:
+    def __init__(self, upstream: FakeUpstream, symbol: str):
+        self._up = upstream
+        self._symbol = symbol
+
+    def _check(self):
+        if self._up._fails():
+            raise ConnectionError(f"simulated rate limit for {self._symbol}")
+
+    @property
+    def info(self):
+        self._check()
+        return dict(self._up.fixture["info"].get(self._symbol, {}))
+
+    @property
+    def fast_info(self):
+        self._check()
+        info = self._up.fixture["info"].get(self._symbol, {})
+        daily = self._up.fixture["daily"]
+        closes = daily["Close"][self._symbol].dropna() if self._symbol in daily["Close"] else pd.Series(dtype=float)
+        return SimpleNamespace(
+            shares=info.get("sharesOutstanding"),
+            market_cap=info.get("marketCap"),
+            previous_close=float(closes.iloc[-1]) if not closes.empty else None,
+            last_volume=float(daily["Volume"][self._symbol].iloc[-1]) if self._symbol in daily["Volume"] else None,
+        )
+
+    def history(self, period="1d", interval="1m", prepost=False, **kwargs):
+        self._check()
+        source = self._up.fixture["intraday"] if interval == "1m" else self._up.fixture["daily"]
+        return source.xs(self._symbol, axis=1, level=1)
+
+    @property
+    def quarterly_income_stmt(self):
+        self._check()
+        return self._up.fixture["income_stmt"].get(self._symbol, pd.DataFrame())
+
+    @property
+    def major_holders(self):
+        self._check()
+        return self._up.fixture["holders"].get(self._symbol, pd.DataFrame())
+
+    @property
+    def analyst_price_targets(self):
+        self._check()
+        return self._up.fixture["price_targets"].get(self._symbol)
+
+
+@contextmanager
+def offline(fixture: dict, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+    """Patch yfinance/FRED with a FakeUpstream for the duration of the block and yield it."""
+    up = FakeUpstream(fixture, latency, error_rate, seed)
+    saved = (yfinance.download, yfinance.Ticker, web.DataReader)
+    yfinance.download, yfinance.Ticker, web.DataReader = up.download, up.ticker, up.data_reader
+    try:
+        yield up
+    finally:
+        yfinance.download, yfinance.Ticker, web.DataReader = saved
@@ -0,0 +1,140 @@
+"""
+Upstream data for the offline benchmarks.
+
+Recorded fixtures live in benchmarks/fixtures/<name>.pkl and are made with
+    python -m benchmarks.fixtures record --name sp500
+which pulls one real snapshot of everything the bot fetches (bulk quotes,
+.info, statements, holders, price targets, FRED M2). When no recording is
+available, synthetic() builds data with the same shapes.
+"""
+import os
+import pickle
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+# tickers that also get statements/holders/price targets recorded
+DETAIL_TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "JPM"]
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Energy", "Industrials", "Utilities"]
+
+
+def path_for(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{name}.pkl")
+
+
+def load(name: str) -> dict:
+    with open(path_for(name), "rb") as f:
+        return pickle.load(f)
+
+
+def save(data: dict, name: str):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(path_for(name), "wb") as f:
+        pickle.dump(data, f)
+
+
+def synthetic(n_tickers: int = 500, seed: int = 0) -> dict:
+    """Fixture with the same structure as a recording, built from random data."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    prev_close = rng.uniform(10, 900, n_tickers)
+    last = prev_close * (1 + rng.normal(0, 0.02, n_tickers))
+    shares = 10 ** rng.uniform(8, 10.4, n_tickers)
+    volume = 10 ** rng.uniform(5, 8, n_tickers)
+
+    # 1m pre-market bars for "today" and 5 daily bars ending yesterday
+    today = pd.Timestamp(datetime.now().date(), tz="America/New_York")
+    minutes = pd.date_range(today + timedelta(hours=4), periods=60, freq="1min")
+    days = pd.bdate_range(end=today - timedelta(days=1), periods=5, tz="America/New_York")
+
+    drift = np.linspace(0, 1, len(minutes))[:, None]
+    intraday_close = prev_close + (last - prev_close) * drift
+    daily_close = prev_close * (1 + rng.normal(0, 0.01, (len(days), n_tickers)))
+    daily_close[-1] = prev_close
+
+    def frame(index, values, vol):
+        cols = {}
+        for field in ["Open", "High", "Low", "Close", "Adj Close"]:
+            cols.update({(field, t): values[:, i] for i, t in enumerate(tickers)})
+        cols.update({("Volume", t): vol[:, i] for i, t in enumerate(tickers)})
+        df = pd.DataFrame(cols, index=index)
+        df.columns = pd.MultiIndex.from_tuples(df.columns, names=["Price", "Ticker"])
+        return df
+
+    intraday = frame(minutes, intraday_close, np.tile(volume / 1000, (len(minutes), 1)))
+    daily = frame(days, daily_close, np.tile(volume, (len(days), 1)))
+
+    info = {t: {"longName": f"Company {t} Inc.", "sector": SECTORS[i % len(SECTORS)],
+                "industry": "Widgets", "marketCap": float(shares[i] * last[i]),
+                "sharesOutstanding": float(shares[i]), "fullTimeEmployees": int(rng.integers(100, 200000)),
+                "country": "United States", "website": f"https://example.com/{t.lower()}"}
+            for i, t in enumerate(tickers)}
+
+    detail = tickers[:len(DETAIL_TICKERS)]
+    quarters = pd.DatetimeIndex([pd.Timestamp(datetime.now().date()) - timedelta(days=91 * i) for i in range(5)])
+    stmts = {t: pd.DataFrame([rng.uniform(0.5, 3, len(quarters))], index=["Diluted EPS"], columns=quarters)
+             for t in detail}
+    holders = {t: pd.DataFrame({"Value": [rng.uniform(0, 0.1), rng.uniform(0.4, 0.8), rng.uniform(0.4, 0.9),
+                                          float(rng.integers(500, 5000))]},
+                               index=["insidersPercentHeld", "institutionsPercentHeld",
+                                      "institutionsFloatPercentHeld", "institutionsCount"])
+               for t in detail}
+    targets = {t: {"current": float(last[i]), "mean": float(last[i] * 1.1), "median": float(last[i] * 1.08),
+                   "high": float(last[i] * 1.5), "low": float(last[i] * 0.7)}
+               for i, t in enumerate(detail)}
+
+    months = pd.date_range("2000-01-01", datetime.now(), freq="MS", name="DATE")
+    m2 = pd.DataFrame({"M2SL": np.linspace(4600, 21500, len(months))}, index=months)
+
+    return {"tickers": tickers, "intraday": intraday, "daily": daily, "info": info,
+            "income_stmt": stmts, "holders": holders, "price_targets": targets, "fred": {"M2SL": m2},
+            "source": f"synthetic n={n_tickers} seed={seed}"}
+
+
+def record(name: str, limit: int = None):
+    """Pull one live snapshot of everything the bot fetches and save it as a fixture."""
+    import yfinance as yf
+    import pandas_datareader.data as web
+    from commands.helpers.constituents import scrape_sp500
+    from commands.helpers.utility import normalize_ticker
+
+    tickers = [normalize_ticker(t) for t in scrape_sp500()][:limit]
+    kwargs = dict(group_by="column", auto_adjust=False, threads=True, progress=False)
+    intraday = yf.download(tickers, period="1d", interval="1m", prepost=True, **kwargs)
+    daily = yf.download(tickers, period="5d", interval="1d", **kwargs)
+
+    info = {}
+    for t in tickers:
+        try:
+            info[t] = yf.Ticker(t).info
+        except Exception as e:
+            print(f"info failed for {t}: {e}")
+
+    stmts, holders, targets = {}, {}, {}
+    for t in DETAIL_TICKERS:
+        ti = yf.Ticker(t)
+        stmts[t] = ti.quarterly_income_stmt
+        holders[t] = ti.major_holders
+        targets[t] = ti.analyst_price_targets
+
+    m2 = web.DataReader("M2SL", "fred", datetime(2000, 1, 1), datetime.today())
+    save({"tickers": tickers, "intraday": intraday, "daily": daily, "info": info,
+          "income_stmt": stmts, "holders": holders, "price_targets": targets, "fred": {"M2SL": m2},
+          "source": f"recorded {datetime.now():%Y-%m-%d %H:%M}"}, name)
+    print(f"Saved {path_for(name)} ({len(tickers)} tickers)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or generate benchmark fixtures")
+    parser.add_argument("mode", choices=["record", "synthetic"])
+    parser.add_argument("--name", default="sp500")
+    parser.add_argument("--limit", type=int, default=None, help="only record the first N tickers")
+    parser.add_argument("--size", type=int, default=500, help="synthetic universe size")
+    args = parser.parse_args()
+    if args.mode == "record":
+        record(args.name, args.limit)
+    else:
+        save(synthetic(args.size), args.name)
+        print(f"Saved {path_for(args.name)}")
@@ -0,0 +1,164 @@
+"""
+Offline benchmark suite for the scan, filter and render pipeline.
+
+Replays a fixture through fake_upstream (no network), times each stage and
+writes the numbers to benchmarks/results/<commit>.json so runs from different
+commits can be compared.
+
+    python -m benchmarks.run                          # synthetic 500-ticker universe
+    python -m benchmarks.run --fixture sp500          # recorded fixture, see fixtures.py
+    python -m benchmarks.run --latency 0.3 --error-rate 0.02
+    python -m benchmarks.run --compare benchmarks/results/<older>.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+
+from benchmarks import fixtures
+from benchmarks.fake_upstream import offline
+from benchmarks.bench_formatters import make_data, scalar, vectorized
+
+import commands.helpers.quote_engine as quote_engine
+import commands.helpers.filter_gainers as filter_gainers
+import commands.helpers.gainer_multiThread as gainer_mt
+import commands.helpers.gainer_async as gainer_async
+import commands.helpers.market_helper as mh
+import commands.helpers.plotting_helper as ph
+from commands.helpers.fred_store import FredStore
+from commands.helpers.quote_snapshot import QuoteSnapshot
+import commands.helpers.fred_store as fred_store
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(RESULTS_DIR), text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def timed(fn, repeat: int, setup=None) -> dict:
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def cold_caches():
+    """Forget anything a previous run cached so every scan does the same work."""
+    quote_engine._shares_cache.clear()
+    fred_store.store = FredStore(directory=tempfile.mkdtemp())
+
+
+def run(fixture: dict, latency: float, error_rate: float, repeat: int, workers: list[int]) -> dict:
+    tickers = fixture["tickers"]
+    results = {}
+
+    pct, nums = make_data(len(tickers))
+    results["format/scalar"] = timed(lambda: scalar(pct, nums), repeat)
+    results["format/vectorized"] = timed(lambda: vectorized(pct, nums), repeat)
+
+    with offline(fixture, latency=latency, error_rate=error_rate):
+        results["scan/getGainers"] = timed(lambda: filter_gainers.getGainers(tickers), repeat, cold_caches)
+        for w in workers:
+            results[f"scan/getGainers_mt/workers={w}"] = timed(
+                lambda: gainer_mt.getGainers_mt(tickers, workers=w), repeat, cold_caches)
+            results[f"scan/async/concurrency={w}"] = timed(
+                lambda: asyncio.run(gainer_async.getGainers_async(tickers, concurrency=w)), repeat, cold_caches)
+
+        # data for the single-ticker charts, fetched once through the same fake upstream
+        detail = list(fixture["income_stmt"])[0]
+        eps = mh.get_eps(detail)
+        targets = mh.get_price_targets(detail)
+        holders = mh.get_major_holders(detail)
+        info, _ = mh.get_info(detail)
+        m2 = mh.m2_data(80)
+
+        rows = quote_engine.fetch_quotes(tickers)
+
+    # picking the top/bottom 5: sorting every row vs argpartition on the snapshot
+    results["select/rows_to_frame"] = timed(lambda: filter_gainers.rows_to_frame(rows), repeat)
+    results["select/snapshot"] = timed(lambda: QuoteSnapshot.from_rows(rows).extremes(5), repeat)
+
+    # the same top/bottom-5 table _build_top5_png renders
+    snapshot = QuoteSnapshot.from_rows(rows)
+    table = filter_gainers.format_gainers(snapshot.to_frame(snapshot.extremes(5)), keep_numeric=True)
+    meta = {t: {"long_name": fixture["info"].get(t, {}).get("longName"),
+                "sector": fixture["info"].get(t, {}).get("sector")} for t in table["Tckr"]}
+
+    results["render/top5"] = timed(lambda: ph.plot_top5(table, meta), repeat)
+    if eps is not None:
+        results["render/eps"] = timed(lambda: ph.plot_eps(eps, detail), repeat)
+    if targets is not None:
+        results["render/price_targets"] = timed(lambda: ph.plot_price_targets(targets), repeat)
+    if holders is not None:
+        results["render/holders"] = timed(lambda: ph.plot_holders(holders, detail), repeat)
+    results["render/info"] = timed(lambda: ph.plot_info(info), repeat)
+    if not m2.empty:
+        results["render/m2"] = timed(lambda: ph.plot_m2(m2), repeat)
+    return results
+
+
+def compare(current: dict, previous_path: str):
+    with open(previous_path) as f:
+        previous = json.load(f)["results"]
+    print(f"\n{'benchmark':<40} {'before':>10} {'after':>10} {'change':>8}")
+    for name, res in current.items():
+        if name in previous:
+            before, after = previous[name]["min"], res["min"]
+            print(f"{name:<40} {before * 1e3:>9.1f}ms {after * 1e3:>9.1f}ms {(after / before - 1) * 100:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scan/filter/render benchmarks")
+    parser.add_argument("--fixture", help="recorded fixture name in benchmarks/fixtures/, synthetic if omitted")
+    parser.add_argument("--size", type=int, default=500, help="synthetic universe size")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every upstream call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance each symbol/call fails")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--out", help="output JSON path, default benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    fixture = fixtures.load(args.fixture) if args.fixture else fixtures.synthetic(args.size)
+    commit = git_commit()
+    out = os.path.abspath(args.out or os.path.join(RESULTS_DIR, f"{commit}.json"))
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    # anything the helpers write (fred_data/, sqlite caches, archives) goes to a scratch dir
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+    results = run(fixture, args.latency, args.error_rate, args.repeat, args.workers)
+
+    for name, res in results.items():
+        print(f"{name:<40} min {res['min'] * 1e3:>9.1f}ms  median {res['median'] * 1e3:>9.1f}ms")
+
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"commit": commit, "timestamp": datetime.now().isoformat(timespec="seconds"),
+                   "fixture": fixture.get("source"), "latency": args.latency, "error_rate": args.error_rate,
+                   "python": sys.version.split()[0], "results": results}, f, indent=2)
+    print(f"\nSaved {out}")
+
+    if compare_path:
+        compare(results, compare_path)
+
+
+if __name__ == "__main__":
+    main()
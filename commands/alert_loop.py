@@ -7,11 +7,28 @@ import io
 from discord.ext import commands
 
 
-from .helpers.utility import log_alert, is_trading_day
+from .helpers.utility import log_alert
+from .helpers.market_calendar import calendar
+from .helpers.channel_registry import registry
+from .helpers.delivery import deliver_all, log_results, summarize
+from .helpers.shared_store import scanner, owns_guild
+import commands.helpers.metrics as metrics
 
 #################  Daily Alert Loop   #################
 
 EST = pytz.timezone("US/Eastern")
+DEFAULT_LEAD_SECONDS = 300   # lead time before any scan has been timed
+REFRESH_LEAD_SECONDS = 20    # the near-cutoff refresh pass runs this long before posting
+ALERT_BEFORE_OPEN = timedelta(minutes=45)   # 8:45 on a normal 9:30 open
+# no alert scan starts earlier than this before the target, so in sharded mode
+# every process agrees that a result from after (target - PREPARE_WINDOW) is this run's
+PREPARE_WINDOW = timedelta(minutes=30)
+
+def _retryable(e: Exception) -> bool:
+    """discord.py already waits out 429s itself; retry server errors and network hiccups, not missing channels/permissions."""
+    if isinstance(e, discord.HTTPException):
+        return e.status >= 500 or e.status == 429
+    return isinstance(e, (OSError, asyncio.TimeoutError))
 
 class AlertCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -29,51 +46,114 @@ class AlertCog(commands.Cog):
             with contextlib.suppress(asyncio.CancelledError):
                 await self._task'''
 
-    async def alert_loop(self):
-        while True:
-            now = datetime.now(EST)
-            target = now.replace(hour=8, minute=45, second=0, microsecond=0)
-
-            if now >= target:
-                target += timedelta(days=1)
-
-            # Wait until the next scheduled time
-            wait_time = (target - now).total_seconds()
-            logging.info(f"[{now}] Sleeping {wait_time / 60:.2f} minutes until next alert...")
-            print(f"[{now}] Sleeping {wait_time / 60:.2f} minutes until next alert...")
+    def _lead_time(self) -> float:
+        """Seconds before the alert to start the scan, based on how long recent scans took."""
+        mc = self.bot.get_cog("MarketCommands")
+        durations = list(mc.scan_durations) if mc is not None else []
+        if not durations:
+            return DEFAULT_LEAD_SECONDS
+        # pad the slowest recent scan, then leave room for the refresh pass
+        return min(max(durations) * 1.5 + REFRESH_LEAD_SECONDS + 30, PREPARE_WINDOW.total_seconds())
+
+    async def _sleep_until(self, when: datetime):
+        wait_time = (when - datetime.now(EST)).total_seconds()
+        if wait_time > 0:
             await asyncio.sleep(wait_time)
 
-            # Re-check the day after sleep
-            if is_trading_day():
-                logging.info("It's a trading day. Sending alert")
-                await self.send_alert()
-            else:
-                logging.info("Market is closed today.")
-
-    async def send_alert(self):
+    async def alert_loop(self):
+        # the calendar pulls in pandas_market_calendars, leave that until after connecting
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                now = datetime.now(EST)
+
+                # Jump straight to the next real session (skips weekends/holidays) and time
+                # the alert off that day's actual open, not a fixed 8:45
+                session = await asyncio.to_thread(calendar.next_session, now, ALERT_BEFORE_OPEN)
+                target = session.open - ALERT_BEFORE_OPEN
+
+                # Wake up early enough that the scan is finished by the target time
+                lead = self._lead_time()
+                prepare_at = target - timedelta(seconds=lead)
+                wait_time = max(0, (prepare_at - now).total_seconds())
+                early = " (early close)" if session.early_close else ""
+                logging.info(f"[{now}] Next session {session.day}{early}, alert at {target:%H:%M}. Sleeping {wait_time / 60:.2f} minutes until the alert scan ({lead:.0f}s lead)...")
+                print(f"[{now}] Next session {session.day}{early}, alert at {target:%H:%M}. Sleeping {wait_time / 60:.2f} minutes until the alert scan ({lead:.0f}s lead)...")
+                await asyncio.sleep(wait_time)
+
+                logging.info("It's a trading day. Preparing alert")
+                result = await self.prepare_alert(target)
+                await self._sleep_until(target)
+                await self.send_alert(result, fresh_after=(target - PREPARE_WINDOW).timestamp())
+            except Exception as e:
+                # one bad morning (scanner not answering, Discord or disk errors) must not end the loop
+                logging.error(f"Daily alert failed: {e}")
+                await asyncio.sleep(60)
+
+    async def prepare_alert(self, target: datetime):
+        """
+        Scan and render ahead of the target time, then re-fetch the names near
+        the top/bottom cutoff shortly before posting.
+        """
+        mc = self.bot.get_cog("MarketCommands")
+        if mc is None:
+            logging.error("MarketCommands cog is not loaded; cannot prepare alert.")
+            return None
+        if not scanner.is_leader():
+            # sharded mode: the scanner process prepares, send_alert picks up what it published
+            return None
+
+        with metrics.span("alert:prepare"):
+            result = await mc._build_top5_png(max_age=0)
+        logging.info(f"Alert scan ready, {(target - datetime.now(EST)).total_seconds():.0f}s before target")
+
+        refresh_at = target - timedelta(seconds=REFRESH_LEAD_SECONDS)
+        if datetime.now(EST) < refresh_at:
+            await self._sleep_until(refresh_at)
+            with metrics.span("alert:refresh"):
+                result = await mc._refresh_top5(result)
+        return result
+
+    async def send_alert(self, result=None, fresh_after: float = None):
         mc = self.bot.get_cog("MarketCommands")
         if mc is None:
             logging.error("MarketCommands cog is not loaded; cannot send alert.")
             return
 
-        # 1) Build once
-        png_bytes, elapsed = await mc._build_top5_png()
+        # 1) Build once, unless prepare_alert already did
+        if result is None:
+            # always from fresh quotes (joins a scan that's already running); a follower
+            # waits for the scanner's result for this run, not any recent one
+            result = await mc._build_top5_png(max_age=0, fresh_after=fresh_after)
+        elapsed = result.elapsed
         header = f"**{datetime.now().strftime('%Y-%m-%d')} Pre-Market Movers**"
 
-        # 2) Fan out to channels using fresh wrappers
-        with open("channels.txt") as f:
-            for line in f:
-                guild_id, channel_id = map(int, line.strip().split(","))
-                channel = self.bot.get_channel(channel_id)
-                if not channel:
-                    logging.warning(f"Channel {channel_id} not found.")
-                    continue
-
-                logging.info(f"Sending alert to guild {guild_id}, channel {channel_id}")
-                file = discord.File(fp=io.BytesIO(png_bytes), filename="premkt_table.png")
-                await channel.send(content=f"{header}\n`{elapsed}`", file=file)
-
-        # 3) Optional explicit cleanup (not strictly necessary)
-        del png_bytes
+        # 2) One image per distinct (top_n, profile) the subscribed channels asked for
+        # in sharded mode every process sends to the guilds on its own shards
+        subscribers = [s for s in registry.subscribers("premarket") if owns_guild(self.bot, s[0])]
+        images = {}
+        for _, _, settings in subscribers:
+            variant = (settings["top_n"], settings["profile"])
+            if variant not in images:
+                images[variant] = await mc._top5_variant(result, *variant)
+
+        # 3) Fan out to all channels concurrently, using fresh wrappers per send
+        async def send(sub):
+            guild_id, channel_id, settings = sub
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                raise LookupError(f"Channel {channel_id} not found")
+            png_bytes = images[(settings["top_n"], settings["profile"])]
+            file = discord.File(fp=io.BytesIO(png_bytes), filename="premkt_table.png")
+            await channel.send(content=f"{header}\n`{elapsed}`", file=file)
+
+        with metrics.span("alert:fanout"):
+            results = await deliver_all(subscribers, send, retryable=_retryable)
+        for r in results:
+            metrics.deliveries.inc(outcome="ok" if r.ok else "failed")
+        log_results(results, "Pre-market alert", describe=lambda sub: f"guild {sub[0]}, channel {sub[1]}")
+        await asyncio.to_thread(log_alert, f"{header}\n{elapsed}\n{summarize(results)}", "premarket")
+
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(AlertCog(bot))
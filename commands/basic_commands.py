@@ -1,6 +1,12 @@
-
+import asyncio
+from datetime import date
 from discord.ext import commands
 
+from .helpers.channel_registry import registry, parse_setting
+from .helpers.alert_archive import archive
+from .helpers.snapshot_store import store as snapshots
+from .helpers.utility import format_percentage, format_large_num, normalize_ticker
+
 
 ################ Commands  ################
 class BasicCommands(commands.Cog):
@@ -16,22 +22,82 @@ class BasicCommands(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def setchannel(self, ctx):
         """Registers the current channel as the one for daily alerts."""
-        with open("channels.txt", "a") as f:
-            f.write(f"{ctx.guild.id},{ctx.channel.id}\n")
-        await ctx.send("This channel has been set for daily alerts!")
+        # the registry reads/appends its journal (and flocks it when sharded), keep that off the event loop
+        if await asyncio.to_thread(registry.add, ctx.guild.id, ctx.channel.id):
+            await ctx.send("This channel has been set for daily alerts!")
+        else:
+            await ctx.send("This channel is already set for daily alerts.")
 
     @commands.command(name='removechannel', help='Removes the current channel from daily alerts')
     @commands.has_permissions(administrator=True)
     async def removechannel(self, ctx):
         """Removes the current channel from the daily alerts list."""
-        lines = []
-        with open("channels.txt", "r") as f:
-            lines = f.readlines()
-        with open("channels.txt", "w") as f:
-            for line in lines:
-                if line.strip() != f"{ctx.guild.id},{ctx.channel.id}":
-                    f.write(line)
-        await ctx.send("This channel has been removed from daily alerts!")
+        if await asyncio.to_thread(registry.remove, ctx.guild.id, ctx.channel.id):
+            await ctx.send("This channel has been removed from daily alerts!")
+        else:
+            await ctx.send("This channel isn't set for daily alerts.")
+
+    @commands.command(name='alertsettings', help='Shows or changes alert settings for this channel. Example: `!alertsettings top_n 3`')
+    @commands.has_permissions(administrator=True)
+    async def alertsettings(self, ctx, key: str = None, value: str = None):
+        """alert: premarket/intraday/all/off, top_n: 1-10 rows per side, profile: standard/compact image."""
+        settings = await asyncio.to_thread(registry.settings, ctx.guild.id, ctx.channel.id)
+        if settings is None:
+            await ctx.send("This channel isn't set for alerts, run `!setchannel` first.")
+            return
+        if key is None or value is None:
+            lines = "\n".join(f"{k}: {v}" for k, v in settings.items())
+            await ctx.send(f"```\n{lines}\n```")
+            return
+        try:
+            parsed = parse_setting(key, value)
+        except ValueError as e:
+            await ctx.send(str(e))
+            return
+        await asyncio.to_thread(registry.set, ctx.guild.id, ctx.channel.id, key, parsed)
+        await ctx.send(f"Set `{key}` to `{parsed}` for this channel.")
+
+    @commands.command(name='history', help='Shows past alerts. `!history` for the latest, `!history 10` for more, `!history 2025-01-31` for one day')
+    async def history(self, ctx, arg: str = "5"):
+        """Reads recent or date-specific alerts from the archive without loading all of it."""
+        movers = None
+        try:
+            if "-" in arg:
+                day = date.fromisoformat(arg)
+                records = await asyncio.to_thread(archive.on_date, day)
+                # the day's saved S&P scan, read from local snapshots
+                movers = await asyncio.to_thread(snapshots.movers, day)
+            else:
+                records = await asyncio.to_thread(archive.recent, min(max(int(arg), 1), 20))
+        except ValueError:
+            await ctx.send("Usage: `!history`, `!history 10` or `!history 2025-01-31`")
+            return
+
+        if not records and not movers:
+            await ctx.send("No alerts found.")
+            return
+        text = "\n\n".join(f"{r['ts']} [{r['kind']}]\n{r['body']}" for r in records)
+        if movers:
+            rows = "\n".join(f"{t:<6} {format_percentage(p):>8} {format_large_num(m):>8}"
+                             for t, p, m, _ in movers.data.tolist())
+            text = f"S&P 500 movers (last scan of the day)\n{rows}\n\n{text}"
+        # stay under Discord's 2000 character message limit
+        await ctx.send(f"```\n{text[:1900]}\n```")
+
+    @commands.command(name='streak', help='How many scanned days in a row a stock has moved the same way. Example: `!streak AAPL`')
+    async def streak(self, ctx, ticker: str = None):
+        """Answered from the saved daily snapshots, no Yahoo requests."""
+        if ticker is None:
+            await ctx.send("Please provide a ticker symbol. Example: `!streak AAPL`")
+            return
+        ticker = normalize_ticker(ticker)
+        run = await asyncio.to_thread(snapshots.streak, ticker)
+        if not run:
+            await ctx.send(f"No saved S&P 500 scans with {ticker} in them.")
+            return
+        direction = "up" if run[0][1] > 0 else "down"
+        days = "\n".join(f"{d} {format_percentage(p):>8}" for d, p in run[:15])
+        await ctx.send(f"{ticker} has been {direction} {len(run)} scanned day(s) in a row:\n```\n{days}\n```")
 
     @commands.command(name='fud', help='self explanatory')
     async def fud(self, ctx):
@@ -0,0 +1,119 @@
+import os
+import bisect
+import json
+import threading
+from datetime import datetime, date
+from commands.helpers.shared_store import file_lock
+
+ARCHIVE_DIR = "alerts_archive"
+MAX_FILE_BYTES = 5 * 1024 * 1024   # start a new segment past this size, on top of the monthly rotation
+INDEX_NAME = "index.tsv"
+
+
+class AlertArchive:
+    """
+    Append-only alert log: JSON-lines segment files rotated by month and size,
+    plus a small tab-separated index of (timestamp, date, segment, offset, length).
+
+    Appends never read existing data. Lookups read the index (one short line per
+    record, read incrementally) and then seek straight to the records they need.
+    Appends take a file lock so several bot processes can share one archive.
+    """
+
+    def __init__(self, directory: str = ARCHIVE_DIR, max_file_bytes: int = MAX_FILE_BYTES):
+        self._dir = directory
+        self._max_file_bytes = max_file_bytes
+        self._index = None   # list of (ts, date_str, segment, offset, length)
+        self._index_bytes = 0   # how much of index.tsv is in self._index
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._dir, name)
+
+    def _load_index(self):
+        """Read index lines we haven't seen yet, ours or appended by another process."""
+        if self._index is None:
+            self._index, self._index_bytes = [], 0
+        try:
+            if os.path.getsize(self._path(INDEX_NAME)) == self._index_bytes:
+                return
+            with open(self._path(INDEX_NAME), "rb") as f:
+                f.seek(self._index_bytes)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode().splitlines():
+            parts = line.split("\t")
+            if len(parts) == 5:
+                ts, day, segment, offset, length = parts
+                self._index.append((ts, day, segment, int(offset), int(length)))
+        self._index_bytes += end
+
+    def _segment_for(self, now: datetime) -> str:
+        """Current segment file name, moving to a new one when the month changes or it gets too big."""
+        month = now.strftime("%Y-%m")
+        n = 0
+        if self._index:
+            last = self._index[-1][2]
+            if last.startswith(f"alerts-{month}-"):
+                n = int(last.rsplit("-", 1)[1].split(".")[0])
+        name = f"alerts-{month}-{n}.jsonl"
+        try:
+            if os.path.getsize(self._path(name)) >= self._max_file_bytes:
+                name = f"alerts-{month}-{n + 1}.jsonl"
+        except OSError:
+            pass
+        return name
+
+    def append(self, body: str, kind: str = "alert", **fields) -> dict:
+        """Append one record. Cost is independent of how big the archive already is."""
+        now = datetime.now()
+        record = {"ts": now.isoformat(timespec="seconds"), "kind": kind, "body": body, **fields}
+        data = (json.dumps(record) + "\n").encode()
+        os.makedirs(self._dir, exist_ok=True)
+        with self._lock, file_lock(self._path("archive.lock")):
+            self._load_index()
+            segment = self._segment_for(now)
+            with open(self._path(segment), "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            entry = (record["ts"], now.date().isoformat(), segment, offset, len(data))
+            line = ("\t".join(map(str, entry)) + "\n").encode()
+            with open(self._path(INDEX_NAME), "ab") as f:
+                f.write(line)
+            self._index.append(entry)
+            self._index_bytes += len(line)
+        return record
+
+    def _read(self, entries) -> list[dict]:
+        records = []
+        for _, _, segment, offset, length in entries:
+            try:
+                with open(self._path(segment), "rb") as f:
+                    f.seek(offset)
+                    records.append(json.loads(f.read(length)))
+            except (OSError, ValueError):
+                continue
+        return records
+
+    def recent(self, n: int = 5) -> list[dict]:
+        """Last n records, newest first."""
+        with self._lock:
+            self._load_index()
+            entries = self._index[-n:][::-1] if n > 0 else []
+        return self._read(entries)
+
+    def on_date(self, day: date, limit: int = 20) -> list[dict]:
+        """Records from one day, oldest first."""
+        key = day.isoformat()
+        with self._lock:
+            self._load_index()
+            # the index is in time order, so one day's records are a contiguous slice
+            lo = bisect.bisect_left(self._index, key, key=lambda e: e[1])
+            hi = bisect.bisect_right(self._index, key, key=lambda e: e[1])
+            entries = self._index[lo:min(hi, lo + limit)]
+        return self._read(entries)
+
+
+archive = AlertArchive()
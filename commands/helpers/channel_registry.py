@@ -0,0 +1,215 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from commands.helpers.shared_store import SHARDED, file_lock
+
+JOURNAL_PATH = "channels.journal"
+LEGACY_PATH = "channels.txt"   # old one-line-per-channel format, imported once
+
+DEFAULT_SETTINGS = {
+    "alert": "premarket",   # which alerts the channel gets, see ALERT_TYPES
+    "top_n": 5,             # rows at each end of the movers table
+    "profile": "standard",  # image profile, see IMAGE_PROFILES
+}
+ALERT_TYPES = ("premarket", "intraday", "all", "off")
+IMAGE_PROFILES = {"standard": 300, "compact": 150}   # profile -> dpi
+
+
+def parse_setting(key: str, value: str):
+    """Validate a user supplied setting. Raises ValueError with a readable message."""
+    if key == "alert":
+        if value not in ALERT_TYPES:
+            raise ValueError(f"`alert` must be one of: {', '.join(ALERT_TYPES)}")
+        return value
+    if key == "top_n":
+        try:
+            n = int(value)
+        except ValueError:
+            n = 0
+        if not 1 <= n <= 10:
+            raise ValueError("`top_n` must be between 1 and 10")
+        return n
+    if key == "profile":
+        if value not in IMAGE_PROFILES:
+            raise ValueError(f"`profile` must be one of: {', '.join(IMAGE_PROFILES)}")
+        return value
+    raise ValueError(f"Unknown setting `{key}`. Settings: {', '.join(DEFAULT_SETTINGS)}")
+
+
+class ChannelRegistry:
+    """
+    Alert channels held in a dict keyed by (guild_id, channel_id), persisted as
+    an append-only JSON-lines journal of add/remove/set operations.
+
+    Every change is one appended line. The journal is rewritten from the live
+    state (compacted) once it has grown well past the number of channels.
+
+    Several bot processes can share one journal (sharded mode): writes and
+    compaction happen under a file lock, and each process replays lines the
+    others appended (or reloads after a compaction) before using its copy.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH, legacy_path: str = LEGACY_PATH):
+        self._path = path
+        self._legacy_path = legacy_path
+        self._channels = {}          # (guild_id, channel_id) -> settings dict
+        self._journal_lines = 0
+        self._offset = 0             # bytes of the journal applied so far
+        self._inode = None           # changes when another process compacts
+        self._subscribers = {}       # alert type -> tuple of keys, rebuilt on change
+        self._lock = threading.Lock()
+        with file_lock(self._path + ".lock"):
+            self._load()
+
+    def _apply(self, op: dict):
+        key = (op["guild"], op["channel"])
+        if op["op"] == "add":
+            self._channels.setdefault(key, dict(DEFAULT_SETTINGS)).update(op.get("settings", {}))
+        elif op["op"] == "remove":
+            self._channels.pop(key, None)
+        elif op["op"] == "set" and key in self._channels:
+            self._channels[key][op["key"]] = op["value"]
+
+    def _load(self):
+        try:
+            self._read_from(0)
+        except FileNotFoundError:
+            self._import_legacy()
+
+    def _read_from(self, offset: int):
+        """Apply journal lines from byte offset on. Raises FileNotFoundError if there is no journal."""
+        with open(self._path, "rb") as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            data = f.read()
+        # stop at the last complete line, a partial one is still being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError) as e:
+                # a torn last line from a crash mid-write, skip it
+                logging.warning(f"Skipping bad channel journal line: {e}")
+            self._journal_lines += 1
+        self._offset = offset + end
+
+    def _sync(self):
+        """Pick up changes other processes made to the journal since we last looked."""
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # compacted by someone else, start over from the new file
+            self._channels.clear()
+            self._journal_lines = 0
+            self._read_from(0)
+        elif st.st_size > self._offset:
+            self._read_from(self._offset)
+        else:
+            return
+        self._subscribers.clear()
+
+    def _import_legacy(self):
+        try:
+            with open(self._legacy_path) as f:
+                for line in f:
+                    if line.strip():
+                        guild_id, channel_id = map(int, line.strip().split(","))
+                        self._channels.setdefault((guild_id, channel_id), dict(DEFAULT_SETTINGS))
+        except FileNotFoundError:
+            return
+        logging.info(f"Imported {len(self._channels)} channels from {self._legacy_path}")
+        self._compact()
+
+    def _append(self, op: dict):
+        with open(self._path, "ab") as f:
+            f.write((json.dumps(op) + "\n").encode())
+            self._offset = f.tell()
+            self._inode = os.fstat(f.fileno()).st_ino
+        self._journal_lines += 1
+        if self._journal_lines > 2 * len(self._channels) + 100:
+            self._compact()
+
+    def _compact(self):
+        tmp = self._path + ".tmp"
+        with open(tmp, "w") as f:
+            for (guild_id, channel_id), settings in self._channels.items():
+                f.write(json.dumps({"op": "add", "guild": guild_id, "channel": channel_id, "settings": settings}) + "\n")
+        os.replace(tmp, self._path)
+        self._journal_lines = len(self._channels)
+        st = os.stat(self._path)
+        self._offset, self._inode = st.st_size, st.st_ino
+
+    @contextmanager
+    def _write_lock(self):
+        """Thread and process lock around a change, with the latest journal applied first."""
+        with self._lock, file_lock(self._path + ".lock"):
+            self._sync()
+            yield
+
+    def _maybe_sync(self):
+        if SHARDED:
+            with self._lock:
+                self._sync()
+
+    def add(self, guild_id: int, channel_id: int) -> bool:
+        """Register a channel. Returns False if it was already registered."""
+        with self._write_lock():
+            if (guild_id, channel_id) in self._channels:
+                return False
+            op = {"op": "add", "guild": guild_id, "channel": channel_id}
+            self._apply(op)
+            self._append(op)
+            self._subscribers.clear()
+            return True
+
+    def remove(self, guild_id: int, channel_id: int) -> bool:
+        """Unregister a channel. Returns False if it wasn't registered."""
+        with self._write_lock():
+            if (guild_id, channel_id) not in self._channels:
+                return False
+            op = {"op": "remove", "guild": guild_id, "channel": channel_id}
+            self._apply(op)
+            self._append(op)
+            self._subscribers.clear()
+            return True
+
+    def set(self, guild_id: int, channel_id: int, key: str, value) -> bool:
+        """Change one setting of a registered channel. Returns False if it isn't registered."""
+        with self._write_lock():
+            if (guild_id, channel_id) not in self._channels:
+                return False
+            op = {"op": "set", "guild": guild_id, "channel": channel_id, "key": key, "value": value}
+            self._apply(op)
+            self._append(op)
+            self._subscribers.clear()
+            return True
+
+    def settings(self, guild_id: int, channel_id: int):
+        """Settings for a channel, or None if it isn't registered."""
+        self._maybe_sync()
+        return self._channels.get((guild_id, channel_id))
+
+    def subscribers(self, alert: str) -> tuple:
+        """
+        (guild_id, channel_id, settings) for every channel getting `alert`.
+        Cached until the registry changes, so fan-out doesn't rebuild it each time.
+        """
+        self._maybe_sync()
+        subs = self._subscribers.get(alert)
+        if subs is None:
+            with self._lock:
+                subs = tuple((g, c, s) for (g, c), s in self._channels.items() if s["alert"] in (alert, "all"))
+                self._subscribers[alert] = subs
+        return subs
+
+    def __len__(self):
+        return len(self._channels)
+
+
+registry = ChannelRegistry()
@@ -0,0 +1,129 @@
+import json
+import os
+import time
+import logging
+import threading
+from commands.helpers.lazy import lazy_import
+pd = lazy_import("pandas")
+import commands.helpers.metrics as metrics
+
+# Membership only changes a few times a quarter, a daily refresh is plenty
+REFRESH_SECONDS = 24 * 60 * 60
+
+
+def scrape_sp500() -> list[str]:
+    """Scrape the S&P 500 tickers from Wikipedia."""
+    sp500 = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')[0]
+    return sp500['Symbol'].tolist()
+
+
+def _scrape_symbol_table(url: str, min_rows: int) -> list[str]:
+    """First table on a Wikipedia page with a Symbol/Ticker column and at least min_rows rows."""
+    for table in pd.read_html(url):
+        for col in ('Symbol', 'Ticker'):
+            if col in table.columns and len(table) >= min_rows:
+                return table[col].dropna().astype(str).tolist()
+    raise ValueError(f"No constituent table found on {url}")
+
+
+def scrape_nasdaq100() -> list[str]:
+    """Scrape the Nasdaq-100 tickers from Wikipedia."""
+    return _scrape_symbol_table('https://en.wikipedia.org/wiki/Nasdaq-100', 90)
+
+
+def scrape_russell1000() -> list[str]:
+    """Scrape the Russell 1000 tickers from Wikipedia."""
+    return _scrape_symbol_table('https://en.wikipedia.org/wiki/Russell_1000_Index', 900)
+
+
+class ConstituentStore:
+    """
+    Index membership served from memory, backed by an on-disk JSON snapshot.
+
+    get() never blocks on the network once a snapshot exists: stale snapshots are
+    returned immediately while a refresh runs in a background thread, and a
+    failed refresh keeps the last good list.
+    """
+
+    def __init__(self, name: str, fetch, path: str, refresh_seconds: float = REFRESH_SECONDS):
+        self.name = name
+        self._fetch = fetch
+        self._path = path
+        self._refresh_seconds = refresh_seconds
+        self._symbols = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        try:
+            with open(self._path) as f:
+                snap = json.load(f)
+            self._symbols = snap["symbols"]
+            self._fetched_at = snap["fetched_at"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable {self.name} snapshot {self._path}: {e}")
+
+    def _save_snapshot(self):
+        tmp = self._path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"fetched_at": self._fetched_at, "symbols": self._symbols}, f)
+        os.replace(tmp, self._path)
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was last refreshed."""
+        return time.time() - self._fetched_at
+
+    def refresh(self) -> bool:
+        """Fetch the list now. Returns False (and keeps the old list) on failure."""
+        try:
+            with metrics.upstream_seconds.time(kind="constituents"):
+                symbols = self._fetch()
+            if not symbols:
+                raise ValueError("empty constituent list")
+        except Exception as e:
+            metrics.record_upstream_error("constituents", e)
+            logging.warning(f"Failed to refresh {self.name} constituents, keeping last snapshot: {e}")
+            return False
+        finally:
+            self._refreshing = False
+
+        with self._lock:
+            self._symbols = list(symbols)
+            self._fetched_at = time.time()
+            try:
+                self._save_snapshot()
+            except OSError as e:
+                logging.warning(f"Could not write {self.name} snapshot: {e}")
+        logging.info(f"Refreshed {self.name} constituents ({len(symbols)} symbols)")
+        return True
+
+    def refresh_in_background(self):
+        """Start a refresh thread unless one is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+    def get(self) -> list[str]:
+        """
+        Return the constituent list.
+
+        Only the very first call without any snapshot on disk waits for the network.
+        """
+        if self._symbols is None:
+            if not self.refresh():
+                raise RuntimeError(f"No {self.name} constituents available")
+        elif self.age > self._refresh_seconds:
+            self.refresh_in_background()
+        return list(self._symbols)
+
+
+sp500 = ConstituentStore("S&P 500", scrape_sp500, "sp500_snapshot.json")
+nasdaq100 = ConstituentStore("Nasdaq-100", scrape_nasdaq100, "nasdaq100_snapshot.json")
+russell1000 = ConstituentStore("Russell 1000", scrape_russell1000, "russell1000_snapshot.json")
@@ -0,0 +1,104 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", 16))   # sends in flight at once
+DELIVERY_RATE = float(os.getenv("DELIVERY_RATE", 40))               # sends/second, under Discord's global 50/s
+DELIVERY_RETRIES = int(os.getenv("DELIVERY_RETRIES", 3))
+
+
+@dataclass
+class Delivery:
+    target: object
+    ok: bool
+    latency: float      # seconds from the first attempt to success/giving up
+    attempts: int
+    error: str = ""
+
+
+class RateLimiter:
+    """Token bucket shared by every send so a big fan-out stays under the global rate limit."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self._rate = rate
+        self._capacity = burst or rate
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+async def _deliver_one(target, send, sem, limiter, retries, retryable) -> Delivery:
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with sem:
+                await limiter.acquire()
+                await send(target)
+            return Delivery(target, True, time.monotonic() - start, attempt)
+        except Exception as e:
+            if attempt > retries or not retryable(e):
+                return Delivery(target, False, time.monotonic() - start, attempt, f"{type(e).__name__}: {e}")
+            # exponential backoff with full jitter so retries don't all land together
+            await asyncio.sleep(random.uniform(0, min(2 ** attempt, 30)))
+
+
+async def deliver_all(targets, send, concurrency: int = DELIVERY_CONCURRENCY, rate: float = DELIVERY_RATE,
+                      retries: int = DELIVERY_RETRIES, retryable=lambda e: True) -> list[Delivery]:
+    """
+    Send to every target concurrently.
+
+    Args:
+        targets: Anything iterable, each item is passed to send.
+        send: Coroutine function taking one target.
+        concurrency (int): Max sends in flight.
+        rate (float): Max sends started per second across all targets.
+        retries (int): Extra attempts per target for errors where retryable(e) is True.
+        retryable: Predicate deciding which exceptions are worth retrying.
+
+    Returns:
+        List[Delivery]: One result per target. A failing target never stops the others.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    limiter = RateLimiter(rate)
+    results = await asyncio.gather(*(
+        _deliver_one(t, send, sem, limiter, retries, retryable) for t in targets
+    ))
+    return list(results)
+
+
+def summarize(results: list[Delivery]) -> str:
+    """One line summary: counts and latency percentiles."""
+    if not results:
+        return "0 deliveries"
+    ok = [r for r in results if r.ok]
+    latencies = sorted(r.latency for r in results)
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return (f"{len(ok)}/{len(results)} delivered, {len(results) - len(ok)} failed, "
+            f"latency p50 {p50:.2f}s p95 {p95:.2f}s max {latencies[-1]:.2f}s")
+
+
+def log_results(results: list[Delivery], label: str = "Alert", describe=str):
+    """Log every delivery plus the summary line. describe turns a target into a readable name."""
+    for r in results:
+        if r.ok:
+            logging.info(f"{label} delivered to {describe(r.target)} in {r.latency:.2f}s ({r.attempts} attempt(s))")
+        else:
+            logging.warning(f"{label} failed for {describe(r.target)} after {r.attempts} attempt(s): {r.error}")
+    logging.info(f"{label} fan-out: {summarize(results)}")
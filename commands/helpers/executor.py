@@ -0,0 +1,79 @@
+import os
+import asyncio
+import functools
+import concurrent.futures
+import commands.helpers.render_pool as render_pool
+import commands.helpers.render_cache as render_cache
+import commands.helpers.metrics as metrics
+
+# Network calls (yfinance, FRED) share a bounded pool so a burst of commands
+# can't spawn unbounded threads or hammer Yahoo.
+IO_WORKERS = int(os.getenv("IO_WORKERS", 8))
+
+IO_TIMEOUT = float(os.getenv("IO_TIMEOUT", 30))          # seconds per data fetch
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", 30))  # seconds per chart
+
+# Charts that only depend on their input data. top5 is left out, its title has
+# today's date and it has its own TTL cache in MarketCommands.
+CACHED_CHARTS = {"eps", "m2", "price_targets", "holders", "info"}
+
+_io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+
+async def _run(pool, timeout, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    fut = loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+    # on timeout the caller gets asyncio.TimeoutError; the worker thread finishes in the background
+    return await asyncio.wait_for(fut, timeout)
+
+
+async def run_io(func, *args, timeout: float = IO_TIMEOUT, **kwargs):
+    """
+    Run a blocking network call (mh.get_* etc.) on the I/O pool.
+
+    The timeout only stops the await: a thread can't be interrupted, so the
+    call keeps its pool slot until it returns and its result is thrown away.
+    """
+    with metrics.span(f"io:{func.__name__}"):
+        return await _run(_io_pool, timeout, func, *args, **kwargs)
+
+
+def submit_io(func, *args, **kwargs) -> concurrent.futures.Future:
+    """
+    Start a blocking call on the I/O pool and return its future, for callers
+    that need to know whether a call they stopped waiting on is still running.
+    """
+    return _io_pool.submit(func, *args, **kwargs)
+
+
+async def run_render(chart: str, *args, timeout: float = RENDER_TIMEOUT, **kwargs) -> bytes:
+    """
+    Render a chart (a render_pool.CHARTS name) in the render process pool.
+    Charts whose input data was rendered before come straight from the render cache.
+
+    Returns:
+        bytes: The PNG.
+    """
+    with metrics.span(f"render:{chart}"):
+        return await _render(chart, args, kwargs, timeout)
+
+
+async def _render(chart, args, kwargs, timeout):
+    key = None
+    if chart in CACHED_CHARTS:
+        key = render_cache.make_key(chart, *args, **kwargs)
+        png_bytes = await asyncio.to_thread(render_cache.cache.get, key)
+        if png_bytes is not None:
+            return png_bytes
+
+    fut = asyncio.wrap_future(render_pool.submit(chart, *args, **kwargs))
+    try:
+        png_bytes = await asyncio.wait_for(fut, timeout)
+    except concurrent.futures.process.BrokenProcessPool:
+        # a worker died mid-render, start over with a fresh pool next time
+        render_pool.reset_pool()
+        raise
+
+    if key is not None:
+        await asyncio.to_thread(render_cache.cache.put, key, png_bytes)
+    return png_bytes
@@ -1,17 +1,24 @@
-import yfinance as yf
-import pandas as pd
+from __future__ import annotations
 import logging
-from commands.helpers.utility import format_percentage, format_large_num, normalize_ticker
+from commands.helpers.lazy import lazy_import
+yf = lazy_import("yfinance")
+pd = lazy_import("pandas")
+from commands.helpers.utility import normalize_ticker
+import commands.helpers.formatters as formatters
+import commands.helpers.quote_engine as quote_engine
+import commands.helpers.constituents as constituents
 
 def getsp500():
     """
     Get the list of S&P 500 tickers.
 
+    Served from the cached constituent snapshot, which refreshes itself daily
+    in the background. See constituents.py.
+
     Returns:
         List[str]: List of S&P 500 tickers.
     """
-    sp500 = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')[0]
-    return sp500['Symbol'].tolist()
+    return constituents.sp500.get()
 
 
 
@@ -51,30 +58,72 @@ def download_data(ticker):
 
 
 
-def getGainers(tickers: list[str], min_market_cap=1e9):
+def rows_to_frame(rows, min_market_cap=1e9) -> pd.DataFrame:
     """
-    Get the top premarket gainers with a market cap above a specified minimum.
+    Filter and sort raw (ticker, pct_change, market_cap, volume) rows, keeping numbers numeric.
 
     Args:
-        tickers (List[str]): List of tickers to check.
+        rows (List[tuple]): Rows as returned by download_data or quote_engine.
         min_market_cap (float): Minimum market capitalization. Defaults to 1 billion.
 
     Returns:
-        pandas.DataFrame: DataFrame of top premarket gainers.
-    """    
-    filtered_data = []
+        pandas.DataFrame: Numeric DataFrame sorted by premarket change, descending.
+    """
+    # Filter rows safely: allow 0.0 pct_change; require non-None and cap threshold
+    filtered = [
+        (t, pct, mcap, vol)
+        for (t, pct, mcap, vol) in rows
+        if (pct is not None) and (mcap is not None) and (mcap > min_market_cap)
+    ]
 
-    for ticker in tickers:
-        filtered_data.append(download_data(ticker))
-    #filter results and prepare for DataFrame
-    filtered_data = [(ticker, pct_change, market_cap, volume) for ticker, pct_change, market_cap, volume in filtered_data if market_cap and pct_change and market_cap > min_market_cap]
+    #sort the list by premarket change
+    filtered.sort(key=lambda r: r[1], reverse=True)
+    return pd.DataFrame(filtered, columns=['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume'])
 
-    #sort the list by premarket change, then reformat the premarket change
-    sorted_data = sorted(filtered_data, key=lambda x: x[1], reverse=True)
-    sorted_data = [(tckr, format_percentage(pct_change), format_large_num(market_cap), format_large_num(volume)) for tckr, pct_change, market_cap, volume in sorted_data]
 
-    # Convert to DataFrame for better readability
-    result_df = pd.DataFrame(sorted_data, columns=['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume'])
+def format_gainers(df: pd.DataFrame, keep_numeric: bool = False) -> pd.DataFrame:
+    """
+    Turn a numeric gainers DataFrame into display strings, one vectorized pass per column.
 
-    return result_df
+    Args:
+        df (pandas.DataFrame): Numeric frame from rows_to_frame.
+        keep_numeric (bool): Also keep the numbers as '_pct', '_mcap' and '_vol' columns
+            next to the display columns (plot_top5 colors rows from '_pct').
+    """
+    display = pd.DataFrame({
+        'Tckr': df['Tckr'].to_numpy(),
+        'Premkt Chg': formatters.format_percentage_col(df['Premkt Chg']),
+        'Mkt Cap': formatters.format_large_num_col(df['Mkt Cap']),
+        'Volume': formatters.format_large_num_col(df['Volume']),
+    })
+    if keep_numeric:
+        display['_pct'] = df['Premkt Chg'].to_numpy(dtype=float)
+        display['_mcap'] = df['Mkt Cap'].to_numpy(dtype=float)
+        display['_vol'] = df['Volume'].to_numpy(dtype=float)
+    return display
+
+
+def build_gainers_df(rows, min_market_cap=1e9) -> pd.DataFrame:
+    """
+    Filter, sort and format raw (ticker, pct_change, market_cap, volume) rows.
+
+    Returns:
+        pandas.DataFrame: Display DataFrame sorted by premarket change, descending.
+    """
+    return format_gainers(rows_to_frame(rows, min_market_cap))
 
+
+def getGainers(tickers: list[str], min_market_cap=1e9):
+    """
+    Get the top premarket gainers with a market cap above a specified minimum.
+
+    Args:
+        tickers (List[str]): List of tickers to check.
+        min_market_cap (float): Minimum market capitalization. Defaults to 1 billion.
+
+    Returns:
+        pandas.DataFrame: DataFrame of top premarket gainers.
+    """
+    # one bulk request per batch of tickers instead of one Ticker per symbol
+    rows = quote_engine.fetch_quotes(tickers)
+    return build_gainers_df(rows, min_market_cap)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from commands.helpers.lazy import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Column-level versions of utility.format_percentage / format_large_num.
+# The numeric work (coercion, NaN checks, magnitude buckets, scaling) is done
+# on whole arrays; only the final float -> str step is per cell, as a plain
+# %-format over a list of Python floats with no function call or try/except.
+# (np.char.mod/np.char.add look vectorized but loop in Python and copy into
+# fixed-width strings, which came out slower than the scalar helpers.)
+
+MISSING = "—"
+
+_THRESHOLDS = (1e3, 1e6, 1e9, 1e12)
+_DIVISORS = (1.0, 1e3, 1e6, 1e9, 1e12)
+_SUFFIXES = ("", "K", "M", "B", "T")
+
+
+def as_float(values) -> np.ndarray:
+    """Coerce anything array-like to float64, unparseable values become NaN."""
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.to_numpy()
+    arr = np.asarray(values)
+    if arr.dtype.kind in "fiub":
+        return arr.astype(float, copy=False)
+    return pd.to_numeric(arr.astype(object), errors="coerce").astype(float)
+
+
+def _fill_missing(out: list, finite: np.ndarray) -> np.ndarray:
+    if not finite.all():
+        for i in np.flatnonzero(~finite).tolist():
+            out[i] = MISSING
+    return np.array(out, dtype=object)
+
+
+def format_percentage_col(values) -> np.ndarray:
+    """
+    Vectorized format_percentage: 0.0123 -> '1.23%'.
+    Returns:
+        np.ndarray: Display strings, MISSING for NaN/None/unparseable values.
+    """
+    v = as_float(values) * 100
+    return _fill_missing(list(map("%.2f%%".__mod__, v.tolist())), np.isfinite(v))
+
+
+def format_large_num_col(values) -> np.ndarray:
+    """
+    Vectorized format_large_num: 2.5e12 -> '2.50T', 3.1e9 -> '3.10B', ...
+    Values are bucketed by magnitude with one searchsorted call.
+    Returns:
+        np.ndarray: Display strings, MISSING for NaN/None/unparseable values.
+    """
+    v = as_float(values)
+    finite = np.isfinite(v)
+    v = np.where(finite, v, 0.0)
+    # same cutoffs as format_large_num: v >= 1e12 -> T, >= 1e9 -> B, ...
+    bucket = np.searchsorted(_THRESHOLDS, v, side="right")
+    scaled = (v / np.asarray(_DIVISORS)[bucket]).tolist()
+    out = ["%.2f%s" % (x, _SUFFIXES[b]) for x, b in zip(scaled, bucket.tolist())]
+    return _fill_missing(out, finite)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import os
+import time
+import logging
+import datetime
+import threading
+from commands.helpers.lazy import lazy_import
+pd = lazy_import("pandas")
+web = lazy_import("pandas_datareader.data")
+import commands.helpers.metrics as metrics
+
+DATA_DIR = "fred_data"
+# Most FRED series we use are monthly, checking for new observations a few times a day is plenty
+CHECK_SECONDS = 6 * 60 * 60
+DEFAULT_START = datetime.datetime(2000, 1, 1)
+
+
+class FredStore:
+    """
+    Local copy of FRED series, one CSV per series under DATA_DIR.
+
+    get() answers from memory. When the last check is older than CHECK_SECONDS a
+    background thread asks FRED only for observations from the last stored date
+    on and appends them. If FRED is down, the stored data keeps being served.
+    """
+
+    def __init__(self, directory: str = DATA_DIR, check_seconds: float = CHECK_SECONDS):
+        self._dir = directory
+        self._check_seconds = check_seconds
+        self._series = {}
+        self._checked = {}
+        self._updating = set()
+        self._lock = threading.Lock()
+
+    def _file(self, series_id: str) -> str:
+        return os.path.join(self._dir, f"{series_id}.csv")
+
+    def _load(self, series_id: str):
+        if series_id in self._series:
+            return
+        try:
+            s = pd.read_csv(self._file(series_id), index_col=0, parse_dates=True).iloc[:, 0]
+            s.index.name = "DATE"
+            self._series[series_id] = s.astype(float)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable local FRED data for {series_id}: {e}")
+
+    def update(self, series_id: str, start: datetime.datetime = DEFAULT_START) -> bool:
+        """Fetch new observations for series_id. Returns False if FRED couldn't be reached."""
+        self._load(series_id)
+        existing = self._series.get(series_id)
+        # refetch from the last stored date so its value picks up any revision
+        fetch_start = existing.index[-1] if existing is not None and not existing.empty else start
+        try:
+            with metrics.upstream_seconds.time(kind="fred"):
+                new = web.DataReader(series_id, "fred", fetch_start, datetime.datetime.today())[series_id].astype(float)
+        except Exception as e:
+            metrics.record_upstream_error("fred", e)
+            logging.warning(f"Failed to update FRED series {series_id}, using local data: {e}")
+            return False
+        finally:
+            self._checked[series_id] = time.time()
+            self._updating.discard(series_id)
+
+        combined = new if existing is None else pd.concat([existing[existing.index < fetch_start], new])
+        combined.index.name = "DATE"
+        with self._lock:
+            self._series[series_id] = combined
+            try:
+                os.makedirs(self._dir, exist_ok=True)
+                tmp = self._file(series_id) + ".tmp"
+                combined.to_csv(tmp, header=[series_id])
+                os.replace(tmp, self._file(series_id))
+            except OSError as e:
+                logging.warning(f"Could not save FRED series {series_id}: {e}")
+        return True
+
+    def get(self, series_id: str, start: datetime.datetime = DEFAULT_START) -> pd.Series:
+        """
+        Numeric series indexed by date. Only blocks on the network the very first time
+        a series is requested and nothing is stored locally.
+        """
+        self._load(series_id)
+        if series_id not in self._series:
+            self.update(series_id, start)
+        elif time.time() - self._checked.get(series_id, 0) > self._check_seconds:
+            with self._lock:
+                if series_id not in self._updating:
+                    self._updating.add(series_id)
+                    threading.Thread(target=self.update, args=(series_id, start), daemon=True).start()
+
+        s = self._series.get(series_id)
+        if s is None:
+            return pd.Series(dtype=float, name=series_id)
+        return s[s.index >= start]
+
+
+store = FredStore()
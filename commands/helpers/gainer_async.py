@@ -0,0 +1,106 @@
+from __future__ import annotations
+import os
+import asyncio
+import random
+import logging
+import threading
+import concurrent.futures
+from commands.helpers.lazy import lazy_import
+pd = lazy_import("pandas")
+from commands.helpers.filter_gainers import build_gainers_df
+from commands.helpers.quote_engine import chunked, fetch_batch
+from commands.helpers.utility import normalize_ticker
+
+# Tunables for the asyncio scan, override through the .env file
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", 8))    # batches in flight at once
+SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", 50))     # tickers per request, 1 = one coroutine per ticker
+SCAN_TIMEOUT = float(os.getenv("SCAN_TIMEOUT", 30))         # seconds per request
+SCAN_RETRIES = int(os.getenv("SCAN_RETRIES", 2))            # extra attempts for requests that failed or timed out
+
+# Downloads are serialized by quote_engine's lock, so more threads would only wait on it:
+# one downloading, one parsing/looking up shares and queued for the lock next.
+# Kept apart from the I/O pool so a scan never starves !eps, !info and friends.
+SCAN_WORKERS = 2
+_scan_pool = concurrent.futures.ThreadPoolExecutor(max_workers=SCAN_WORKERS, thread_name_prefix="scan")
+
+
+async def _wait_started(started: threading.Event, running: concurrent.futures.Future):
+    """Wait, without a deadline, until the batch holds the download lock (or finished)."""
+    while not (started.is_set() or running.done()):
+        await asyncio.sleep(0.05)
+
+
+async def _fetch_with_retry(batch: list[str], sem: asyncio.Semaphore, timeout: float, retries: int) -> list[tuple]:
+    """
+    Fetch one batch under the semaphore. Requests that fail or time out are
+    retried with exponential backoff + jitter; tickers that simply have no
+    data are not. A timed-out request keeps running in its thread (threads
+    can't be stopped), so the retry waits on it again instead of starting another.
+    The timeout only counts from when the request gets the download lock, not
+    the time spent queued behind other downloads.
+    """
+    running = started = None
+    for attempt in range(retries + 1):
+        if attempt:
+            # back off outside the semaphore so other batches keep the slot busy
+            await asyncio.sleep(min(2 ** attempt, 10) + random.uniform(0, 0.5))
+        try:
+            async with sem:
+                if running is None:
+                    started = threading.Event()
+                    running = _scan_pool.submit(fetch_batch, batch, started)
+                await _wait_started(started, running)
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(running)), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Quote request timed out for {len(batch)} tickers (attempt {attempt + 1}), still waiting on it")
+        except Exception as e:
+            logging.warning(f"Quote request failed for {len(batch)} tickers (attempt {attempt + 1}): {e}")
+            running = None
+
+    # the aggregator gets an empty row for every ticker of a batch that never came back
+    return [(normalize_ticker(t), None, None, None) for t in batch]
+
+
+async def scan_async(tickers: list[str], concurrency: int = SCAN_CONCURRENCY, batch_size: int = SCAN_BATCH_SIZE,
+                     timeout: float = SCAN_TIMEOUT, retries: int = SCAN_RETRIES, on_rows=None) -> list[tuple]:
+    """
+    Fetch quotes for all tickers with one coroutine per batch.
+
+    Args:
+        tickers (List[str]): Tickers to scan.
+        concurrency (int): Max requests in flight at once.
+        batch_size (int): Tickers per request. 1 gives one coroutine per ticker.
+        timeout (float): Seconds before a single request is abandoned and retried.
+        retries (int): Extra attempts for requests that failed or timed out.
+        on_rows (callable): Optional callback, called with each batch's rows as it completes.
+
+    Returns:
+        List[tuple]: (ticker, pct_change, market_cap, volume) rows in completion order.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    tasks = [asyncio.create_task(_fetch_with_retry(b, sem, timeout, retries))
+             for b in chunked(list(tickers), batch_size)]
+
+    all_rows = []
+    try:
+        # results stream in as each batch finishes, a slow batch only delays itself
+        for fut in asyncio.as_completed(tasks):
+            rows = await fut
+            all_rows.extend(rows)
+            if on_rows is not None:
+                on_rows(rows)
+    finally:
+        for t in tasks:
+            t.cancel()
+    return all_rows
+
+
+async def getGainers_async(tickers: list[str], min_market_cap=1e9, **kwargs) -> pd.DataFrame:
+    """
+    Asyncio version of getGainers / getGainers_mt, returns the same DataFrame.
+    Extra keyword arguments are passed through to scan_async.
+    """
+    if not tickers:
+        return pd.DataFrame(columns=['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume'])
+    rows = await scan_async(tickers, **kwargs)
+    return build_gainers_df(rows, min_market_cap)
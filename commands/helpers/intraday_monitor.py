@@ -0,0 +1,113 @@
+import os
+import logging
+import datetime
+import threading
+from typing import NamedTuple
+import commands.helpers.quote_engine as qe
+
+INTRADAY_THRESHOLD = float(os.getenv("INTRADAY_THRESHOLD", 0.05))          # alert every 5% of move
+INTRADAY_MIN_MARKET_CAP = float(os.getenv("INTRADAY_MIN_MARKET_CAP", 1e9))
+INTRADAY_FULL_EVERY = int(os.getenv("INTRADAY_FULL_EVERY", 5))    # every Nth tick refreshes the whole universe
+INTRADAY_NEAR = float(os.getenv("INTRADAY_NEAR", 0.02))            # other ticks only fetch names this close to an alert
+
+
+class Crossing(NamedTuple):
+    ticker: str
+    pct: float           # change vs previous close
+    market_cap: float
+    level: int           # signed number of thresholds crossed, e.g. -2 = down 2x threshold
+
+
+class IntradayMonitor:
+    """
+    Live snapshot of a universe during the session.
+
+    start_day() fetches the reference data (previous close, shares) once per
+    session; tick() then only pulls last prices and reports tickers whose move
+    crossed a new multiple of the threshold since the last alert for them.
+    Crossings keep being reported until commit() records them as sent.
+
+    Every full_every-th tick fetches the whole universe. The ticks in between
+    only fetch names whose last price was within `near` of a move that would
+    alert, so most ticks cost a handful of requests instead of ~500.
+    """
+
+    def __init__(self, threshold: float = INTRADAY_THRESHOLD, min_market_cap: float = INTRADAY_MIN_MARKET_CAP,
+                 full_every: int = INTRADAY_FULL_EVERY, near: float = INTRADAY_NEAR):
+        self.threshold = threshold
+        self.min_market_cap = min_market_cap
+        self.full_every = max(1, full_every)
+        self.near = near
+        self.day = None
+        self._ticks = 0
+        self._prev_close = {}
+        self._shares = {}
+        self._last = {}
+        self._alerted = {}       # ticker -> level last alerted
+        self._lock = threading.Lock()
+
+    def start_day(self, tickers: list[str], day: datetime.date):
+        """Load previous closes and shares for `day` and forget yesterday's alerts."""
+        prev_close = qe.fetch_prev_closes(tickers, day)
+        shares = qe.get_shares(list(prev_close))
+        with self._lock:
+            self.day = day
+            self._prev_close = prev_close
+            self._shares = shares
+            self._last = {}
+            self._alerted = {}
+            self._ticks = 0
+        logging.info(f"Intraday monitor ready for {day}: {len(prev_close)}/{len(tickers)} tickers with a previous close")
+
+    def _level(self, pct: float) -> int:
+        return int(pct / self.threshold)
+
+    def _near(self, ticker: str, price: float) -> bool:
+        """Whether a last price is within `near` of the next move that would alert for ticker."""
+        shares = self._shares.get(ticker)
+        if not shares or shares * price * (1 + self.near) < self.min_market_cap:
+            return False
+        pct = price / self._prev_close[ticker] - 1
+        alerted = self._alerted.get(ticker, 0)
+        up = (max(alerted, 0) + 1) * self.threshold
+        down = -(max(-alerted, 0) + 1) * self.threshold
+        return pct >= up - self.near or pct <= down + self.near
+
+    def _watchlist(self) -> list[str]:
+        with self._lock:
+            full = self._ticks % self.full_every == 0
+            self._ticks += 1
+            if full:
+                return list(self._prev_close)
+            return [t for t, price in self._last.items() if self._near(t, price)]
+
+    def tick(self) -> list[Crossing]:
+        """Refresh last prices and return the new threshold crossings, biggest moves first."""
+        watch = self._watchlist()
+        prices = qe.fetch_last_prices(watch) if watch else {}
+        crossings = []
+        with self._lock:
+            self._last.update(prices)
+            for t, price in prices.items():
+                shares = self._shares.get(t)
+                market_cap = shares * price if shares else None
+                if market_cap is None or market_cap < self.min_market_cap:
+                    continue
+                pct = price / self._prev_close[t] - 1
+                level = self._level(pct)
+                alerted = self._alerted.get(t, 0)
+                # only a move further out than the last alert counts, so a name
+                # hovering around a threshold doesn't alert on every tick
+                if level != 0 and (abs(level) > abs(alerted) or (level > 0) != (alerted > 0)):
+                    crossings.append(Crossing(t, pct, market_cap, level))
+        crossings.sort(key=lambda c: abs(c.pct), reverse=True)
+        return crossings
+
+    def commit(self, crossings: list[Crossing]):
+        """Record crossings as alerted once they've been delivered, so they aren't reported again."""
+        with self._lock:
+            for c in crossings:
+                self._alerted[c.ticker] = c.level
+
+
+monitor = IntradayMonitor()
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import types
+import logging
+import importlib
+import threading
+import commands.helpers.metrics as metrics
+
+# LAZY_IMPORTS=0 imports everything up front like before (handy when profiling)
+LAZY_IMPORTS = os.getenv("LAZY_IMPORTS", "1") != "0"
+
+import_seconds = metrics.gauge("bot_import_seconds", "Wall time to import each heavy dependency")
+import_times = {}        # module name -> seconds its first import took
+_registered = []         # every LazyModule handed out, in creation order
+_import_lock = threading.Lock()
+_warmed = False
+
+
+def _import(name: str) -> types.ModuleType:
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - start
+    # only the first import of a name costs anything, later ones hit sys.modules
+    if name not in import_times:
+        import_times[name] = elapsed
+        import_seconds.set(elapsed, module=name)
+        logging.info(f"Imported {name} in {elapsed * 1e3:.0f}ms")
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Every attribute read, write and delete is forwarded to the real module
+    (nothing is copied onto the proxy), so patches to the module, e.g.
+    mock.patch("yfinance.download"), are seen through the proxy and undone with it.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        target = self.__dict__["_lazy_target"]
+        if target is None:
+            with _import_lock:
+                target = self.__dict__["_lazy_target"]
+                if target is None:
+                    target = _import(self.__name__)
+                    self.__dict__["_lazy_target"] = target
+        return target
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str):
+    """
+    `pd = lazy_import("pandas")` instead of `import pandas as pd`.
+    The import happens the first time an attribute is used, or in warm().
+    """
+    if not LAZY_IMPORTS:
+        return _import(name)
+    module = LazyModule(name)
+    _registered.append(module)
+    return module
+
+
+def warm():
+    """Import every lazily registered module now. Meant for a background thread after the bot is ready."""
+    global _warmed
+    if _warmed:
+        return
+    _warmed = True
+    start = time.perf_counter()
+    for module in list(_registered):
+        try:
+            module._load()
+        except Exception as e:
+            logging.warning(f"Background import of {module.__name__} failed: {e}")
+    logging.info(f"Warmed lazy imports in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,108 @@
+import bisect
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+import pytz
+from commands.helpers.lazy import lazy_import
+mcal = lazy_import("pandas_market_calendars")
+
+EST = pytz.timezone("US/Eastern")
+REGULAR_CLOSE_HOUR = 16
+PREMARKET = timedelta(hours=5, minutes=30)     # pre-market trading starts 4:00, 5.5h before the open
+
+
+class Session(NamedTuple):
+    day: date
+    open: datetime          # tz-aware, US/Eastern
+    close: datetime         # tz-aware, US/Eastern
+    early_close: bool
+
+
+class SessionCalendar:
+    """
+    Exchange sessions held in memory, built once per calendar year.
+
+    Days are stored as sorted date ordinals next to open/close epoch seconds in
+    flat arrays, so "is this a trading day" is a dict lookup and "next session"
+    is one bisect.
+    """
+
+    def __init__(self, exchange: str = "NYSE"):
+        self._exchange = exchange
+        self._years = set()
+        self._days = array("l")      # date.toordinal()
+        self._opens = array("d")     # epoch seconds
+        self._closes = array("d")
+        self._index = {}             # ordinal -> position
+        self._lock = threading.Lock()
+
+    def _ensure_year(self, year: int):
+        if year in self._years:
+            return
+        with self._lock:
+            if year in self._years:
+                return
+            sched = mcal.get_calendar(self._exchange).schedule(start_date=f"{year}-01-01", end_date=f"{year}-12-31")
+            rows = list(zip(self._days, self._opens, self._closes))
+            rows += [(d.toordinal(), o.timestamp(), c.timestamp())
+                     for d, o, c in zip(sched.index.date, sched["market_open"], sched["market_close"])]
+            rows.sort()
+            self._days = array("l", (r[0] for r in rows))
+            self._opens = array("d", (r[1] for r in rows))
+            self._closes = array("d", (r[2] for r in rows))
+            self._index = {d: i for i, d in enumerate(self._days)}
+            self._years.add(year)
+
+    def _session_at(self, i: int) -> Session:
+        opened = datetime.fromtimestamp(self._opens[i], EST)
+        closed = datetime.fromtimestamp(self._closes[i], EST)
+        early = closed.hour < REGULAR_CLOSE_HOUR
+        return Session(date.fromordinal(self._days[i]), opened, closed, early)
+
+    def session(self, day: date):
+        """The session on `day`, or None if the market is closed."""
+        self._ensure_year(day.year)
+        i = self._index.get(day.toordinal())
+        return None if i is None else self._session_at(i)
+
+    def is_trading_day(self, day: date) -> bool:
+        self._ensure_year(day.year)
+        return day.toordinal() in self._index
+
+    def quote_day(self, at: datetime) -> date:
+        """
+        The session that quotes seen at `at` belong to: today's from the start of
+        pre-market on a trading day, otherwise the last session before it
+        (so a weekend or holiday scan still reports Friday's moves as Friday's).
+        """
+        at = at.astimezone(EST)
+        self._ensure_year(at.year - 1)
+        self._ensure_year(at.year)
+        i = bisect.bisect_right(self._days, at.date().toordinal()) - 1
+        if i >= 0 and self._days[i] == at.date().toordinal() and at.timestamp() < self._opens[i] - PREMARKET.total_seconds():
+            i -= 1
+        if i < 0:
+            raise RuntimeError(f"No {self._exchange} session found before {at}")
+        return date.fromordinal(self._days[i])
+
+    def next_session(self, after: datetime, before_open: timedelta = timedelta(0)) -> Session:
+        """
+        First session whose (open - before_open) is later than `after`.
+        e.g. before_open=45 minutes finds the next session whose 45-minutes-before-open mark is still ahead.
+        """
+        after = after.astimezone(EST)
+        self._ensure_year(after.year)
+        i = bisect.bisect_left(self._days, after.date().toordinal())
+        while True:
+            if i >= len(self._days):
+                # ran off the end of what's loaded, pull in the next year
+                self._ensure_year(date.fromordinal(self._days[-1]).year + 1 if self._days else after.year + 1)
+                if i >= len(self._days):
+                    raise RuntimeError(f"No {self._exchange} sessions found after {after}")
+            if self._opens[i] - before_open.total_seconds() > after.timestamp():
+                return self._session_at(i)
+            i += 1
+
+
+calendar = SessionCalendar()
@@ -1,8 +1,9 @@
-import yfinance as yf
-import pandas as pd
-from commands.helpers.utility import format_large_num, format_percentage
-import pandas_datareader.data as web
-import datetime
+from __future__ import annotations
+from commands.helpers.lazy import lazy_import
+pd = lazy_import("pandas")
+from commands.helpers.utility import format_percentage
+import commands.helpers.fred_store as fred_store
+from commands.helpers.ticker_data import data as ticker_data
 
 def get_eps(ticker: str) -> pd.DataFrame:
     """
@@ -13,7 +14,10 @@ def get_eps(ticker: str) -> pd.DataFrame:
         pd.DataFrame: DataFrame containing the EPS data or None if retrieval fails.
     """
     try:
-        eps_data = yf.Ticker(ticker).quarterly_income_stmt.loc['Diluted EPS'].dropna()
+        stmt = ticker_data.get("quarterly_income_stmt", ticker)
+        if stmt is None:
+            return None
+        eps_data = stmt.loc['Diluted EPS'].dropna()
         if eps_data.empty:
             return None
         df = eps_data.reset_index()
@@ -32,7 +36,7 @@ def get_price_targets(ticker: str) -> pd.DataFrame:
         pd.DataFrame: DataFrame containing the analyst price targets or None if retrieval fails.
     """
     try:
-        price_targets = yf.Ticker(ticker).analyst_price_targets
+        price_targets = ticker_data.get("price_targets", ticker)
         #use is None since .analyst_price_targets is a Dict, and Dict doesn't have an empty attribute
         if price_targets is None:
             return None
@@ -56,8 +60,8 @@ def get_major_holders(ticker: str) -> pd.DataFrame:
         pd.DataFrame: DataFrame containing the major holders data or None if retrieval fails.
     """
     try:
-        major_holders = yf.Ticker(ticker).major_holders
-        if major_holders.empty:
+        major_holders = ticker_data.get("holders", ticker)
+        if major_holders is None:
             return None
         # the loc method returns a Series, so we access the first element with .iloc[0]
         df = {"Insiders": format_percentage(major_holders.loc['insidersPercentHeld'].iloc[0]),
@@ -70,27 +74,21 @@ def get_major_holders(ticker: str) -> pd.DataFrame:
     
 def m2_data(periods: int) -> pd.DataFrame:
     """
-    Fetch M2 Money Stock data from FRED.
+    Fetch M2 Money Stock data from the local FRED store (see fred_store.py).
     Returns:
-        pd.DataFrame: DataFrame containing M2 Money Stock data.
+        pd.DataFrame: DataFrame with a numeric 'M2 Money Stock' column in dollars, most recent month first.
     """
-
-    start = datetime.datetime(2000, 1, 1)
-    end = datetime.datetime.today()
-
-    m2 = web.DataReader("M2SL", "fred", start, end) # M2 Money Stock (seasonally adjusted, billions of dollars)
+    m2 = fred_store.store.get("M2SL")  # M2 Money Stock (seasonally adjusted, billions of dollars)
     if m2.empty:
         return pd.DataFrame()
-    m2 = m2.rename(columns={"M2SL": "M2 Money Stock"})
-    m2['M2 Money Stock'] = m2['M2 Money Stock'].apply(lambda x: format_large_num(x*10**9)) #manually multiply by 10^9 to convert to dollars
+    m2 = (m2 * 10**9).to_frame("M2 Money Stock") #manually multiply by 10^9 to convert to dollars
     m2.index = m2.index.to_period("M")
 
     #reverse the DataFrame to have the most recent date at the top
     return m2.iloc[::-1].head(n=periods)
 
 def get_info(ticker: str):
-    yf_ticker = yf.Ticker(ticker)
-    info = yf_ticker.info
+    info = ticker_data.get("info", ticker) or {}
 
     website = info.get("website", "N/A")
     # Defensive access with .get() to avoid KeyError if missing
@@ -0,0 +1,141 @@
+import time
+import sqlite3
+import logging
+import threading
+from commands.helpers.lazy import lazy_import
+yf = lazy_import("yfinance")
+from commands.helpers.utility import normalize_ticker
+import commands.helpers.metrics as metrics
+
+# Names and sectors almost never change, refresh entries once a month
+TTL_SECONDS = 30 * 24 * 60 * 60
+# small pause between .info calls so a full prewarm doesn't trip rate limits
+PACING_SECONDS = 0.2
+
+
+class MetadataCache:
+    """
+    Ticker -> {long_name, sector, shares} store backed by SQLite.
+
+    Reads only ever touch the in-memory copy, so lookups on the render path
+    never hit the network. Missing or stale entries are fetched by a single
+    background thread via prewarm().
+    """
+
+    def __init__(self, path: str, ttl: float = TTL_SECONDS):
+        self._path = path
+        self._ttl = ttl
+        self._mem = None
+        self._lock = threading.Lock()
+        self._queue = set()
+        self._worker = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self._path, timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            "ticker TEXT PRIMARY KEY, long_name TEXT, sector TEXT, shares REAL, fetched_at REAL)"
+        )
+        return conn
+
+    def _read(self) -> dict:
+        mem = {}
+        try:
+            with self._connect() as conn:
+                for ticker, long_name, sector, shares, fetched_at in conn.execute("SELECT * FROM metadata"):
+                    mem[ticker] = {"long_name": long_name, "sector": sector,
+                                   "shares": shares, "fetched_at": fetched_at}
+        except sqlite3.Error as e:
+            logging.warning(f"Could not read metadata cache {self._path}: {e}")
+        return mem
+
+    def _load(self):
+        if self._mem is not None:
+            return
+        with self._lock:
+            if self._mem is None:
+                self._mem = self._read()
+
+    def reload(self):
+        """Re-read the database, e.g. after another process added entries."""
+        mem = self._read()
+        with self._lock:
+            # keep anything fetched here while we were reading, then swap in one
+            # assignment so readers on other threads never see a missing dict
+            for ticker, entry in (self._mem or {}).items():
+                if ticker not in mem or entry["fetched_at"] > mem[ticker]["fetched_at"]:
+                    mem[ticker] = entry
+            self._mem = mem
+
+    def get(self, ticker: str):
+        """Cached entry for ticker, or None. Never hits the network."""
+        self._load()
+        return self._mem.get(normalize_ticker(ticker))
+
+    def get_many(self, tickers: list[str]) -> dict:
+        self._load()
+        return {t: self._mem.get(normalize_ticker(t)) for t in tickers}
+
+    def stale(self, tickers: list[str]) -> list[str]:
+        """Tickers that are missing or older than the TTL."""
+        self._load()
+        cutoff = time.time() - self._ttl
+        out = []
+        for t in tickers:
+            entry = self._mem.get(normalize_ticker(t))
+            if entry is None or entry["fetched_at"] < cutoff:
+                out.append(normalize_ticker(t))
+        return out
+
+    def fetch(self, ticker: str):
+        """Fetch one ticker from yfinance and store it. Returns the entry or None."""
+        try:
+            with metrics.upstream_seconds.time(kind="yf_info"):
+                info = yf.Ticker(ticker).info
+        except Exception as e:
+            metrics.record_upstream_error("yf_info", e)
+            logging.warning(f"Error fetching metadata for {ticker}: {e}")
+            return None
+        entry = {
+            "long_name": info.get("longName"),
+            "sector": info.get("sector"),
+            "shares": info.get("sharesOutstanding"),
+            "fetched_at": time.time(),
+        }
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)",
+                    (ticker, entry["long_name"], entry["sector"], entry["shares"], entry["fetched_at"]),
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Could not write metadata for {ticker}: {e}")
+        self._load()
+        with self._lock:
+            self._mem[ticker] = entry
+        return entry
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._worker = None
+                    return
+                ticker = self._queue.pop()
+            self.fetch(ticker)
+            time.sleep(PACING_SECONDS)
+
+    def prewarm(self, tickers: list[str]):
+        """Queue missing/stale tickers for a background refresh and return immediately."""
+        todo = self.stale(tickers)
+        if not todo:
+            return
+        with self._lock:
+            self._queue.update(todo)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._drain, name="metadata-prewarm", daemon=True)
+                self._worker.start()
+        logging.info(f"Prewarming metadata for {len(todo)} tickers")
+
+
+metadata = MetadataCache("ticker_metadata.db")
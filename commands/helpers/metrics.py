@@ -0,0 +1,196 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a fast cache hit up to a slow full scan
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RECENT_SAMPLES = 512   # observations kept per series for !stats percentiles
+
+_lock = threading.Lock()
+_metrics = {}           # name -> metric
+START_TIME = time.time()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _label_text(key: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self) -> float:
+        with _lock:
+            return sum(self.values.values())
+
+    def snapshot(self) -> dict:
+        """Copy of {label key: value}, safe to iterate while other threads keep counting."""
+        with _lock:
+            return dict(self.values)
+
+    def expose(self) -> list[str]:
+        return [f"{self.name}{_label_text(k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self.values[_label_key(labels)] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.series = {}   # label key -> [bucket counts, sum, count, recent deque]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with _lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [[0] * len(self.buckets), 0.0, 0, deque(maxlen=RECENT_SAMPLES)]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+            s[3].append(value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def percentiles(self, key: tuple, qs=(0.5, 0.95)) -> list[float]:
+        """Percentiles over the recent samples of one series."""
+        with _lock:
+            s = self.series.get(key)
+            recent = sorted(s[3]) if s is not None else []
+        if not recent:
+            return [0.0 for _ in qs]
+        return [recent[min(len(recent) - 1, int(q * len(recent)))] for q in qs]
+
+    def summary(self, qs=(0.5, 0.95)) -> list[tuple]:
+        """[(label key, count, *percentiles)] for every series, sorted by key. Copies under the lock first."""
+        with _lock:
+            copied = {key: (s[2], sorted(s[3])) for key, s in self.series.items()}
+        out = []
+        for key, (count, recent) in sorted(copied.items()):
+            pcts = [recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0 for q in qs]
+            out.append((key, count, *pcts))
+        return out
+
+    def expose(self) -> list[str]:
+        lines = []
+        for key, (counts, total, count, _) in self.series.items():
+            for b, c in zip(self.buckets, counts):
+                le = 'le="%s"' % b
+                lines.append(f"{self.name}_bucket{_label_text(key, le)} {c}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(key, le)} {count}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {total}")
+            lines.append(f"{self.name}_count{_label_text(key)} {count}")
+        return lines
+
+
+def _register(metric):
+    with _lock:
+        return _metrics.setdefault(metric.name, metric)
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return _register(Counter(name, help))
+
+
+def gauge(name: str, help: str = "") -> Gauge:
+    return _register(Gauge(name, help))
+
+
+def histogram(name: str, help: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, buckets))
+
+
+# Shared metrics used across the bot
+stage_seconds = histogram("bot_stage_seconds", "Wall time per pipeline stage")
+upstream_seconds = histogram("bot_upstream_request_seconds", "Latency of requests to Yahoo/FRED/Wikipedia")
+# tickers are fetched in batches, so per-ticker latency is a batch's wall time divided by its size
+ticker_fetch_seconds = histogram("bot_ticker_fetch_seconds", "Quote fetch time per ticker (batch time / tickers in the batch)",
+                                 buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+upstream_errors = counter("bot_upstream_errors_total", "Failed upstream requests")
+rate_limited = counter("bot_upstream_rate_limited_total", "Upstream requests rejected for rate limiting")
+ticker_errors = counter("bot_ticker_errors_total", "Tickers that came back without usable data")
+loop_lag = histogram("bot_event_loop_lag_seconds", "How late the event loop ran a timer",
+                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+deliveries = counter("bot_alert_deliveries_total", "Alert sends by outcome")
+
+# callables returning {metric name: value}, evaluated at scrape time (e.g. cache stats)
+_collectors = []
+
+
+def add_collector(fn):
+    _collectors.append(fn)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as one pipeline stage: `with span("scan"): ...`. Works inside coroutines too."""
+    with stage_seconds.time(stage=stage):
+        yield
+
+
+def record_upstream_error(kind: str, error: Exception):
+    upstream_errors.inc(kind=kind)
+    text = str(error).lower()
+    if "429" in text or "too many requests" in text or "rate limit" in text:
+        rate_limited.inc(kind=kind)
+
+
+async def monitor_loop_lag(interval: float = 0.5):
+    """Sleep `interval` forever and record how much later than asked the loop woke us."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, loop.time() - start - interval))
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for m in _metrics.values():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.expose())
+    for fn in _collectors:
+        for name, value in fn().items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    lines.append("# TYPE bot_uptime_seconds gauge")
+    lines.append(f"bot_uptime_seconds {time.time() - START_TIME:.0f}")
+    return "\n".join(lines) + "\n"
@@ -1,9 +1,9 @@
 import io
 import re
-import yfinance as yf
 import matplotlib.pyplot as plt
 from datetime import datetime
 import pandas as pd
+import commands.helpers.metadata_cache as metadata_cache
 
 
 def truncate_text(text, max_chars=20):
@@ -62,12 +62,22 @@ def clean_name(name):
 
 
 # Plotting method for top5
-def plot_top5(df):
+def plot_top5(df, metadata=None, dpi=300, title="Top Movers in the S&P 500"):
     """
-    Takes in df with columns ['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume']
+    Takes in df with columns ['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume'], plus an
+    optional numeric '_pct' column (see filter_gainers.format_gainers) used for coloring.
+    metadata: optional {ticker: {"long_name", "sector"}}, read from the local
+    metadata cache when not given. Rendering never calls yfinance.
+    title: heading for the scanned universe, " (Premarket) — <date>" is appended.
     """
 
     df = df.copy()
+    if '_pct' in df.columns:
+        change_values = df['_pct'].reset_index(drop=True)
+    else:
+        change_values = df['Premkt Chg'].str.replace('%', '', regex=False).astype(float).reset_index(drop=True)
+    # numeric companion columns aren't part of the table
+    df = df[[c for c in df.columns if not c.startswith('_')]].copy()
 
     # Rename columns
     rename_map = {
@@ -77,25 +87,21 @@ def plot_top5(df):
     df.rename(columns=rename_map, inplace=True)
 
     # extract tickers and add ticker info
-    tickers = df['Stock'].str.extract(r'^(\w+)')[0] 
+    tickers = df['Stock'].tolist()
+    if metadata is None:
+        metadata = metadata_cache.metadata.get_many(tickers)
     merged_names = []
     sectors = []
     for ticker in tickers:
-        try:
-            info = yf.Ticker(ticker).info
-            long_name = clean_name(info.get("longName", "N/A"))
-            sector = info.get("sector", "N/A")
-            merged_names.append(f"{ticker} ({long_name})")
-            sectors.append(sector)
-        except Exception as e:
-            # this happens when the yfinance API is rate limited, putting N/A here for now. Happens less when using non multi-threaded getGainers
-            merged_names.append(f"{ticker} (N/A)")
-            sectors.append("N/A")
+        # cache misses show N/A, prewarm() fills them in for the next render
+        entry = metadata.get(ticker) or {}
+        merged_names.append(f"{ticker} ({clean_name(entry.get('long_name'))})")
+        sectors.append(entry.get("sector") or "N/A")
     df['Stock'] = [truncate_text(name, 27) for name in merged_names]
     df['Sector'] = [truncate_text(sec, 27) for sec in sectors]
 
-    change_values = df['Premkt Chg'].str.replace('%', '', regex=False).astype(float)
-    fig, ax = plt.subplots(figsize=(9, 3))
+    # 3 inches fits the default 5+5 rows (plus header), grow with top_n up to 10+10
+    fig, ax = plt.subplots(figsize=(9, max(3, 3 * (len(df) + 1) / 11)))
     ax.axis('off')
     table = ax.table(cellText=df.values,
                      colLabels=df.columns,
@@ -132,7 +138,7 @@ def plot_top5(df):
 
     # Add title with today's date
     today_str = datetime.today().strftime("%B %d, %Y")
-    plt.title(f"Top Movers in the S&P 500 (Premarket) — {today_str}",
+    plt.title(f"{title} (Premarket) — {today_str}",
               fontsize=11, fontweight='bold')
 
 
@@ -142,7 +148,7 @@ def plot_top5(df):
 
     # Send visualization over as buffer
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, dpi=300)
+    plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, dpi=dpi)
     plt.close(fig)
     buf.seek(0)
 
@@ -152,24 +158,19 @@ def plot_top5(df):
 def plot_m2(df):
     """
     Plots the M2 Money Stock over time and returns an in-memory PNG buffer.
-    df: DataFrame indexed by DATE with a column 'M2 Money Stock' (string values like '22.02T')
+    df: DataFrame indexed by DATE with a numeric column 'M2 Money Stock' (dollars)
     """
 
-    if isinstance(df.index, pd.PeriodIndex):
-        df.index = df.index.to_timestamp()
-
     # Set to dates
     df = df.copy()
+    if isinstance(df.index, pd.PeriodIndex):
+        df.index = df.index.to_timestamp()
     df = df.reset_index()  
     df['Date'] = pd.to_datetime(df['DATE'])
     df = df.sort_values('Date')
 
-    # Convert T to actual trillions
-    df['M2 Money Stock'] = (
-        df['M2 Money Stock']
-        .str.replace('T', '', regex=False)
-        .astype(float)
-    )
+    # Convert to trillions
+    df['M2 Money Stock'] = df['M2 Money Stock'] / 1e12
 
     fig, ax = plt.subplots(figsize=(7, 5)) 
 
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from typing import NamedTuple
+from commands.helpers.utility import normalize_ticker
+from commands.helpers.shared_store import SHARDED, SHARD_IDS
+
+# alerts live with the process that runs their guild's shard, so each shard set keeps its own journal
+JOURNAL_PATH = f"price_alerts.shards-{'-'.join(map(str, SHARD_IDS))}.journal" if SHARDED and SHARD_IDS else "price_alerts.journal"
+MAX_ALERTS_PER_USER = int(os.getenv("MAX_ALERTS_PER_USER", 25))
+DIRECTIONS = ("above", "below")
+
+
+class PriceAlert(NamedTuple):
+    id: int
+    user_id: int
+    channel_id: int
+    ticker: str
+    direction: str       # "above" or "below"
+    price: float
+    created: float
+
+
+class _TickerIndex:
+    """
+    Thresholds for one ticker in two sorted arrays (prices and alert ids side by side).
+
+    "above" alerts fire for every threshold <= price, a prefix of the array;
+    "below" alerts fire for every threshold >= price, a suffix. Either is one bisect.
+    """
+
+    __slots__ = ("above_prices", "above_ids", "below_prices", "below_ids")
+
+    def __init__(self):
+        self.above_prices, self.above_ids = [], []
+        self.below_prices, self.below_ids = [], []
+
+    def _arrays(self, direction: str):
+        if direction == "above":
+            return self.above_prices, self.above_ids
+        return self.below_prices, self.below_ids
+
+    def add(self, alert: PriceAlert):
+        prices, ids = self._arrays(alert.direction)
+        i = bisect.bisect_right(prices, alert.price)
+        prices.insert(i, alert.price)
+        ids.insert(i, alert.id)
+
+    def remove(self, alert: PriceAlert):
+        prices, ids = self._arrays(alert.direction)
+        i = bisect.bisect_left(prices, alert.price)
+        while i < len(prices) and prices[i] == alert.price:
+            if ids[i] == alert.id:
+                del prices[i], ids[i]
+                return
+            i += 1
+
+    def pop_crossed(self, price: float) -> list[int]:
+        """Remove and return the ids of every alert crossed at `price`."""
+        fired = []
+        i = bisect.bisect_right(self.above_prices, price)
+        if i:
+            fired.extend(self.above_ids[:i])
+            del self.above_prices[:i], self.above_ids[:i]
+        j = bisect.bisect_left(self.below_prices, price)
+        if j < len(self.below_prices):
+            fired.extend(self.below_ids[j:])
+            del self.below_prices[j:], self.below_ids[j:]
+        return fired
+
+    def __len__(self):
+        return len(self.above_prices) + len(self.below_prices)
+
+
+class PriceAlertBook:
+    """
+    User price alerts, indexed per ticker and persisted as an append-only
+    JSON-lines journal of add/remove operations (same scheme as channel_registry).
+
+    Alerts are one-shot: evaluate() takes whatever fired out of the index and
+    settle() drops the delivered ones from the journal and puts the rest back.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self._path = path
+        self._alerts = {}          # id -> PriceAlert
+        self._by_ticker = {}       # ticker -> _TickerIndex
+        self._by_user = {}         # user_id -> set of ids
+        self._pending = {}         # id -> PriceAlert fired but not settled yet
+        self._next_id = 1
+        self._journal_lines = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _index(self, alert: PriceAlert):
+        self._alerts[alert.id] = alert
+        self._by_ticker.setdefault(alert.ticker, _TickerIndex()).add(alert)
+        self._by_user.setdefault(alert.user_id, set()).add(alert.id)
+        self._next_id = max(self._next_id, alert.id + 1)
+
+    def _unindex(self, alert_id: int, from_ticker: bool = True):
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        if from_ticker:
+            index = self._by_ticker[alert.ticker]
+            index.remove(alert)
+            if not index:
+                del self._by_ticker[alert.ticker]
+        ids = self._by_user.get(alert.user_id)
+        if ids is not None:
+            ids.discard(alert_id)
+            if not ids:
+                del self._by_user[alert.user_id]
+        return alert
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        op = json.loads(line)
+                        if op["op"] == "add":
+                            self._index(PriceAlert(**op["alert"]))
+                        elif op["op"] == "remove":
+                            for alert_id in op["ids"]:
+                                self._unindex(alert_id)
+                    except (ValueError, KeyError, TypeError) as e:
+                        logging.warning(f"Skipping bad price alert journal line: {e}")
+                    self._journal_lines += 1
+        except FileNotFoundError:
+            pass
+
+    def _append(self, op: dict):
+        try:
+            with open(self._path, "a") as f:
+                f.write(json.dumps(op) + "\n")
+            self._journal_lines += 1
+            if self._journal_lines > 2 * len(self._alerts) + 100:
+                self._compact()
+        except OSError as e:
+            logging.warning(f"Could not write price alert journal: {e}")
+
+    def _compact(self):
+        tmp = self._path + ".tmp"
+        with open(tmp, "w") as f:
+            for alert in self._alerts.values():
+                f.write(json.dumps({"op": "add", "alert": alert._asdict()}) + "\n")
+        os.replace(tmp, self._path)
+        self._journal_lines = len(self._alerts)
+
+    def add(self, user_id: int, channel_id: int, ticker: str, direction: str, price: float) -> PriceAlert:
+        """Create an alert. Raises ValueError with a readable message on bad input."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direction must be one of: {', '.join(DIRECTIONS)}")
+        if not price > 0:
+            raise ValueError("Price must be a positive number")
+        with self._lock:
+            if len(self._by_user.get(user_id, ())) >= MAX_ALERTS_PER_USER:
+                raise ValueError(f"You already have {MAX_ALERTS_PER_USER} alerts, remove one with `!unalert <id>` first")
+            alert = PriceAlert(self._next_id, user_id, channel_id, normalize_ticker(ticker), direction, float(price), time.time())
+            self._index(alert)
+            self._append({"op": "add", "alert": alert._asdict()})
+        return alert
+
+    def remove(self, user_id: int, alert_id: int) -> bool:
+        """Remove one of the user's alerts. Returns False if they don't own an alert with that id."""
+        with self._lock:
+            alert = self._alerts.get(alert_id)
+            if alert is None or alert.user_id != user_id:
+                return False
+            self._unindex(alert_id)
+            self._append({"op": "remove", "ids": [alert_id]})
+            return True
+
+    def for_user(self, user_id: int) -> list[PriceAlert]:
+        with self._lock:
+            return sorted((self._alerts[i] for i in self._by_user.get(user_id, ())), key=lambda a: a.id)
+
+    def tickers(self) -> list[str]:
+        """Tickers with at least one active alert, the only ones worth fetching."""
+        return list(self._by_ticker)
+
+    def evaluate(self, prices: dict) -> list[tuple]:
+        """
+        Match a batch of {ticker: last price} against the index.
+
+        Returns:
+            List[tuple]: (PriceAlert, price) for every alert that fired. Fired alerts leave the
+            index but stay in the journal until settle() is called for them.
+        """
+        fired = []
+        with self._lock:
+            for ticker, price in prices.items():
+                index = self._by_ticker.get(ticker)
+                if index is None:
+                    continue
+                ids = index.pop_crossed(price)
+                if not index:
+                    del self._by_ticker[ticker]
+                for alert_id in ids:
+                    alert = self._unindex(alert_id, from_ticker=False)
+                    self._pending[alert_id] = alert
+                    fired.append((alert, price))
+        return fired
+
+    def settle(self, delivered: list[int], failed: list[int] = ()):
+        """After posting fired alerts: forget the delivered ones for good, re-arm the ones that couldn't be sent."""
+        with self._lock:
+            for alert_id in failed:
+                alert = self._pending.pop(alert_id, None)
+                if alert is not None:
+                    self._index(alert)
+            done = [i for i in delivered if self._pending.pop(i, None) is not None]
+            if done:
+                self._append({"op": "remove", "ids": done})
+
+    def __len__(self):
+        return len(self._alerts)
+
+
+book = PriceAlertBook()
@@ -0,0 +1,239 @@
+from __future__ import annotations
+import logging
+import time
+import datetime
+import threading
+import concurrent.futures
+from commands.helpers.lazy import lazy_import
+yf = lazy_import("yfinance")
+pd = lazy_import("pandas")
+from commands.helpers.utility import normalize_ticker
+import commands.helpers.metadata_cache as metadata_cache
+import commands.helpers.metrics as metrics
+
+# Symbols per yf.download call. yf.download still makes one HTTP request per
+# symbol (run in parallel by its own threads); batching bounds how many are in
+# flight and how big each result frame gets.
+BATCH_SIZE = 100
+
+# yf.download collects results in module globals (yfinance.shared._DFS), so two
+# calls running at once overwrite each other's symbols. Only one runs at a time.
+_download_lock = threading.Lock()
+
+# Shares outstanding barely move during a day, so market cap is computed as
+# shares * last price and the shares are only looked up once per day. Failed
+# lookups are retried after SHARES_RETRY_SECONDS instead of being kept all day.
+SHARES_WORKERS = 4
+SHARES_RETRY_SECONDS = 5 * 60
+_shares_cache = {}
+_shares_failed = {}     # ticker -> time.monotonic() when it may be retried
+_shares_date = None
+_shares_lock = threading.Lock()
+_shares_pool = concurrent.futures.ThreadPoolExecutor(max_workers=SHARES_WORKERS, thread_name_prefix="shares")
+
+
+def chunked(seq, size):
+    """Split seq into consecutive lists of at most `size` items."""
+    size = max(1, size)
+    return [seq[i:i+size] for i in range(0, len(seq), size)]
+
+
+def _field(frame: pd.DataFrame, field: str, tickers: list[str]) -> pd.DataFrame:
+    """
+    Pull one OHLCV field out of a yf.download frame as a (time x ticker) DataFrame.
+    yf.download returns flat columns for a single symbol, MultiIndex otherwise.
+    """
+    if frame is None or frame.empty:
+        return pd.DataFrame()
+    if isinstance(frame.columns, pd.MultiIndex):
+        if field not in frame.columns.get_level_values(0):
+            return pd.DataFrame()
+        return frame[field]
+    if field not in frame.columns:
+        return pd.DataFrame()
+    return frame[[field]].set_axis(tickers[:1], axis=1)
+
+
+def _download(tickers: list[str], started: threading.Event = None, **kwargs) -> pd.DataFrame:
+    """yf.download under the download lock. `started` is set once the lock is held, i.e. the request really begins."""
+    try:
+        with _download_lock, metrics.upstream_seconds.time(kind="yf_download"):
+            if started is not None:
+                started.set()
+            return yf.download(
+                tickers=tickers,
+                group_by="column",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+                **kwargs,
+            )
+    except Exception as e:
+        metrics.record_upstream_error("yf_download", e)
+        raise
+
+
+def _get_shares(ticker: str):
+    try:
+        with metrics.upstream_seconds.time(kind="yf_fast_info"):
+            return yf.Ticker(ticker).fast_info.shares
+    except Exception as e:
+        metrics.record_upstream_error("yf_fast_info", e)
+        logging.warning(f"Error fetching shares for {ticker}: {e}")
+        return None
+
+
+def get_shares(tickers: list[str]) -> dict:
+    """
+    Shares outstanding for each ticker, cached for the rest of the day.
+    Only symbols not seen today and not in the metadata cache hit the network,
+    through one shared pool of SHARES_WORKERS threads.
+    """
+    global _shares_date
+    today = datetime.date.today()
+    now = time.monotonic()
+    cached = metadata_cache.metadata.get_many(tickers)
+    with _shares_lock:
+        if _shares_date != today:
+            _shares_cache.clear()
+            _shares_failed.clear()
+            _shares_date = today
+        # the metadata cache usually already has sharesOutstanding from .info
+        for t, entry in cached.items():
+            if t not in _shares_cache and entry and entry.get("shares"):
+                _shares_cache[t] = entry["shares"]
+        missing = [t for t in tickers if t not in _shares_cache and _shares_failed.get(t, 0) <= now]
+
+    if missing:
+        fetched = list(zip(missing, _shares_pool.map(_get_shares, missing)))
+        retry_at = time.monotonic() + SHARES_RETRY_SECONDS
+        with _shares_lock:
+            for t, shares in fetched:
+                if shares is None:
+                    _shares_failed[t] = retry_at
+                else:
+                    _shares_cache[t] = shares
+                    _shares_failed.pop(t, None)
+    with _shares_lock:
+        return {t: _shares_cache.get(t) for t in tickers}
+
+
+def fetch_batch(tickers: list[str], started: threading.Event = None) -> list[tuple]:
+    """
+    Fetch quotes for one batch of tickers with two yf.download calls (1m and daily
+    bars, one HTTP request per symbol each) plus a shares lookup for symbols not
+    seen yet today.
+
+    Args:
+        tickers (List[str]): Tickers to fetch, at most BATCH_SIZE is recommended.
+        started (threading.Event): Optional, set when the first download gets the
+            download lock, for callers timing the request rather than the queue.
+
+    Returns:
+        List[tuple]: (ticker, pct_change, market_cap, volume) rows, same shape as
+        filter_gainers.download_data. Fields are None when data is missing.
+    """
+    tickers = [normalize_ticker(t) for t in tickers]
+    if not tickers:
+        return []
+    start = time.perf_counter()
+
+    # last price INCLUDING pre/post market
+    intraday = _download(tickers, started, period="1d", interval="1m", prepost=True)
+    # daily bars give the previous regular session close and the last volume
+    daily = _download(tickers, period="5d", interval="1d")
+
+    closes_1m = _field(intraday, "Close", tickers)
+    closes_1d = _field(daily, "Close", tickers)
+    volumes_1d = _field(daily, "Volume", tickers)
+    shares = get_shares(tickers)
+
+    rows = []
+    for t in tickers:
+        try:
+            last = closes_1m[t].dropna()
+            hist = closes_1d[t].dropna()
+            if last.empty or hist.empty:
+                raise ValueError(f"Missing price data for {t}")
+
+            last_price = float(last.iloc[-1])
+            # previous close is the last daily close from before the session the
+            # latest 1m bar belongs to (there may or may not be a bar for today yet)
+            session_day = last.index[-1].date()
+            prior = hist[[d.date() < session_day for d in hist.index]]
+            if prior.empty:
+                raise ValueError(f"Missing previous close for {t}")
+            prev_close = float(prior.iloc[-1])
+
+            vol = volumes_1d[t].dropna() if t in volumes_1d else pd.Series(dtype=float)
+            volume = float(vol.iloc[-1]) if not vol.empty else None
+            market_cap = shares[t] * last_price if shares.get(t) else None
+
+            rows.append((t, (last_price / prev_close) - 1, market_cap, volume))
+        except Exception as e:
+            logging.warning(f"Error processing {t}: {e}")
+            metrics.ticker_errors.inc()
+            rows.append((t, None, None, None))
+    # every ticker in the batch arrives at once, so this is an amortized per-ticker figure
+    metrics.ticker_fetch_seconds.observe((time.perf_counter() - start) / len(tickers))
+    return rows
+
+
+def fetch_prev_closes(tickers: list[str], session_day: datetime.date, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Close of the regular session before `session_day` for each ticker.
+    Used as the day's reference price, so it only needs fetching once per session.
+    """
+    closes = {}
+    for batch in chunked([normalize_ticker(t) for t in tickers], batch_size):
+        try:
+            daily = _field(_download(batch, period="5d", interval="1d"), "Close", batch)
+        except Exception as e:
+            logging.warning(f"Previous close request failed for {len(batch)} tickers: {e}")
+            continue
+        for t in batch:
+            if t not in daily:
+                continue
+            hist = daily[t].dropna()
+            prior = hist[[d.date() < session_day for d in hist.index]]
+            if not prior.empty:
+                closes[t] = float(prior.iloc[-1])
+    return closes
+
+
+def fetch_last_prices(tickers: list[str], lookback_minutes: int = 10, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Latest 1m close for each ticker, only asking Yahoo for the last few minutes of bars.
+    Tickers that haven't traded inside the lookback window are left out.
+    """
+    start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=lookback_minutes)
+    prices = {}
+    for batch in chunked([normalize_ticker(t) for t in tickers], batch_size):
+        try:
+            closes = _field(_download(batch, start=start, interval="1m"), "Close", batch)
+        except Exception as e:
+            logging.warning(f"Last price request failed for {len(batch)} tickers: {e}")
+            continue
+        for t in batch:
+            if t in closes:
+                last = closes[t].dropna()
+                if not last.empty:
+                    prices[t] = float(last.iloc[-1])
+    return prices
+
+
+def fetch_quotes(tickers: list[str], batch_size: int = BATCH_SIZE) -> list[tuple]:
+    """
+    Fetch quotes for a whole universe in bulk, one batch after another.
+
+    Returns:
+        List[tuple]: (ticker, pct_change, market_cap, volume) rows.
+    """
+    rows = []
+    for batch in chunked(list(tickers), batch_size):
+        try:
+            rows.extend(fetch_batch(batch))
+        except Exception as e:
+            logging.warning(f"Bulk quote request failed for {len(batch)} tickers: {e}")
+            rows.extend((normalize_ticker(t), None, None, None) for t in batch)
+    return rows
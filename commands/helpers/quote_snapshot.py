@@ -0,0 +1,129 @@
+from __future__ import annotations
+import functools
+from commands.helpers.lazy import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+@functools.cache
+def dtype():
+    """One row per ticker. Missing numbers are NaN so every column stays numeric."""
+    # built on first use so importing this module doesn't import numpy
+    return np.dtype([
+        ("ticker", "U12"),
+        ("pct", "f8"),       # change vs previous close, 0.05 = +5%
+        ("mcap", "f8"),
+        ("volume", "f8"),
+    ])
+
+
+COLUMNS = ['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume']   # filter_gainers' numeric frame layout
+
+
+def _num(v) -> float:
+    return np.nan if v is None else float(v)
+
+
+class QuoteSnapshot:
+    """
+    Scan result held as a NumPy structured array plus a ticker -> row index.
+
+    Numbers stay numeric for the snapshot's whole life: top/bottom selection is an
+    argpartition over the pct column, refreshes overwrite rows in place, and only
+    the handful of rows that get rendered are ever turned into display strings.
+    """
+
+    __slots__ = ("data", "_index")
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+        self._index = {t: i for i, t in enumerate(data["ticker"].tolist())}
+
+    @classmethod
+    def from_rows(cls, rows) -> "QuoteSnapshot":
+        """Build from (ticker, pct_change, market_cap, volume) rows, None for missing values."""
+        rows = list(rows)
+        data = np.empty(len(rows), dtype=dtype())
+        if rows:
+            tickers, pcts, mcaps, vols = zip(*rows)
+            data["ticker"] = tickers
+            data["pct"] = [_num(v) for v in pcts]
+            data["mcap"] = [_num(v) for v in mcaps]
+            data["volume"] = [_num(v) for v in vols]
+        return cls(data)
+
+    def copy(self) -> "QuoteSnapshot":
+        """Independent copy, for updating a snapshot other readers may still hold."""
+        return QuoteSnapshot(self.data.copy())
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, ticker: str):
+        return ticker in self._index
+
+    def _eligible(self, min_market_cap: float) -> np.ndarray:
+        """Row numbers with a % change and a market cap above min_market_cap."""
+        pct, mcap = self.data["pct"], self.data["mcap"]
+        return np.flatnonzero(~np.isnan(pct) & (mcap > min_market_cap))
+
+    def _select(self, n: int, min_market_cap: float, largest: bool) -> np.ndarray:
+        rows = self._eligible(min_market_cap)
+        keys = self.data["pct"][rows]
+        if largest:
+            keys = -keys
+        if n < len(rows):
+            # O(n) partial selection, then only the n picked rows get sorted
+            picked = np.argpartition(keys, n)[:n]
+            rows, keys = rows[picked], keys[picked]
+        return rows[np.argsort(keys, kind="stable")]
+
+    def top(self, n: int, min_market_cap: float = 1e9) -> np.ndarray:
+        """Row numbers of the n biggest gainers, biggest first."""
+        return self._select(n, min_market_cap, largest=True)
+
+    def bottom(self, n: int, min_market_cap: float = 1e9) -> np.ndarray:
+        """Row numbers of the n biggest losers, biggest loss first."""
+        return self._select(n, min_market_cap, largest=False)
+
+    def extremes(self, n: int, min_market_cap: float = 1e9) -> np.ndarray:
+        """Top n and bottom n rows together, without duplicates, sorted by % change descending."""
+        rows = np.union1d(self.top(n, min_market_cap), self.bottom(n, min_market_cap)).astype(np.intp)
+        return rows[np.argsort(-self.data["pct"][rows], kind="stable")]
+
+    def tickers(self, rows: np.ndarray = None) -> list[str]:
+        return (self.data["ticker"] if rows is None else self.data["ticker"][rows]).tolist()
+
+    def update(self, rows) -> int:
+        """
+        Overwrite quotes in place from (ticker, pct_change, market_cap, volume) rows.
+        Rows with no % change are skipped so a failed refetch keeps the old quote.
+        Returns the number of rows updated; tickers not in the snapshot are appended.
+        """
+        new = []
+        updated = 0
+        for t, pct, mcap, vol in rows:
+            if pct is None:
+                continue
+            i = self._index.get(t)
+            if i is None:
+                new.append((t, pct, mcap, vol))
+                continue
+            self.data[i] = (t, pct, _num(mcap), _num(vol))
+            updated += 1
+        if new:
+            extra = QuoteSnapshot.from_rows(new).data
+            start = len(self.data)
+            self.data = np.concatenate([self.data, extra])
+            self._index.update({t: start + i for i, t in enumerate(extra["ticker"].tolist())})
+        return updated + len(new)
+
+    def to_frame(self, rows: np.ndarray = None) -> pd.DataFrame:
+        """Numeric ['Tckr', 'Premkt Chg', 'Mkt Cap', 'Volume'] frame for the given rows, as filter_gainers.format_gainers expects."""
+        data = self.data if rows is None else self.data[rows]
+        return pd.DataFrame({
+            'Tckr': data["ticker"].astype(object),
+            'Premkt Chg': data["pct"],
+            'Mkt Cap': data["mcap"],
+            'Volume': data["volume"],
+        }, columns=COLUMNS)
@@ -0,0 +1,110 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from commands.helpers.lazy import lazy_import
+pd = lazy_import("pandas")
+import commands.helpers.metrics as metrics
+
+MEMORY_ENTRIES = int(os.getenv("RENDER_CACHE_ENTRIES", 128))   # PNGs kept in memory
+DISK_ENTRIES = int(os.getenv("RENDER_CACHE_DISK_ENTRIES", 2000))
+CACHE_DIR = "render_cache"
+
+
+def _hash_arg(h, arg):
+    if isinstance(arg, pd.DataFrame):
+        h.update(repr(list(arg.columns)).encode())
+        h.update(repr(list(arg.dtypes.astype(str))).encode())
+        h.update(pd.util.hash_pandas_object(arg, index=True).values.tobytes())
+    elif isinstance(arg, dict):
+        for k in sorted(arg, key=str):
+            h.update(repr(k).encode())
+            _hash_arg(h, arg[k])
+    else:
+        h.update(repr(arg).encode())
+    h.update(b"\0")
+
+
+def make_key(chart: str, *args, **kwargs) -> str:
+    """Content address for a render: chart type + hash of the input data."""
+    h = hashlib.sha256(chart.encode())
+    for arg in args:
+        _hash_arg(h, arg)
+    _hash_arg(h, kwargs)
+    return f"{chart}-{h.hexdigest()[:32]}"
+
+
+class RenderCache:
+    """
+    Two-tier PNG cache: a bounded in-memory LRU in front of a directory of
+    <key>.png files. Keys come from make_key, so identical data always maps to
+    the same file and there is nothing to invalidate.
+    """
+
+    def __init__(self, path: str = CACHE_DIR, memory_entries: int = MEMORY_ENTRIES, disk_entries: int = DISK_ENTRIES):
+        self._path = path
+        self._memory_entries = memory_entries
+        self._disk_entries = disk_entries
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self._path, f"{key}.png")
+
+    def _remember(self, key: str, png_bytes: bytes):
+        with self._lock:
+            self._mem[key] = png_bytes
+            self._mem.move_to_end(key)
+            while len(self._mem) > self._memory_entries:
+                self._mem.popitem(last=False)
+
+    def get(self, key: str):
+        """PNG bytes for key, or None on a miss."""
+        with self._lock:
+            png_bytes = self._mem.get(key)
+            if png_bytes is not None:
+                self._mem.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return png_bytes
+        try:
+            with open(self._file(key), "rb") as f:
+                png_bytes = f.read()
+        except OSError:
+            self.stats["misses"] += 1
+            return None
+        self.stats["disk_hits"] += 1
+        self._remember(key, png_bytes)
+        return png_bytes
+
+    def put(self, key: str, png_bytes: bytes):
+        self._remember(key, png_bytes)
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            tmp = f"{self._file(key)}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(png_bytes)
+            os.replace(tmp, self._file(key))
+            self._prune()
+        except OSError as e:
+            logging.warning(f"Could not write render cache entry {key}: {e}")
+
+    def _prune(self):
+        files = [os.path.join(self._path, f) for f in os.listdir(self._path) if f.endswith(".png")]
+        if len(files) <= self._disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for f in files[:len(files) - self._disk_entries]:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+    def hit_rate(self) -> float:
+        total = sum(self.stats.values())
+        return (self.stats["memory_hits"] + self.stats["disk_hits"]) / total if total else 0.0
+
+
+cache = RenderCache()
+metrics.add_collector(lambda: {f"bot_render_cache_{k}": v for k, v in cache.stats.items()})
@@ -0,0 +1,91 @@
+import io
+import os
+import logging
+import multiprocessing
+import concurrent.futures
+
+# Worker processes for chart rendering. Each has its own pyplot state, so
+# renders run in parallel without stepping on each other.
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES", 2))
+# Recycle a worker after this many charts to keep matplotlib memory growth in check
+JOBS_PER_WORKER = int(os.getenv("RENDER_JOBS_PER_WORKER", 100))
+
+# chart name -> plotting_helper function
+CHARTS = {
+    "eps": "plot_eps",
+    "top5": "plot_top5",
+    "m2": "plot_m2",
+    "price_targets": "plot_price_targets",
+    "holders": "plot_holders",
+    "info": "plot_info",
+}
+
+_pool = None
+
+
+def _init_worker():
+    """Runs once per worker: load matplotlib with Agg, resolve fonts and pay the first-render cost."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+    import commands.helpers.plotting_helper  # noqa: F401  (import cost paid up front)
+
+    font_manager.findfont(matplotlib.rcParams["font.family"][0])
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.plot([0, 1], [0, 1])
+    ax.table(cellText=[["warm"]], loc="center")
+    fig.savefig(io.BytesIO(), format="png", dpi=300)
+    plt.close(fig)
+
+
+def _render(chart: str, args: tuple, kwargs: dict) -> bytes:
+    """Worker side: run one plotting_helper function and return the PNG bytes."""
+    import commands.helpers.plotting_helper as ph
+    buf = getattr(ph, CHARTS[chart])(*args, **kwargs)
+    png_bytes = buf.getvalue()
+    buf.close()
+    return png_bytes
+
+
+def get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn so workers never inherit the bot's event loop, sockets or pyplot state
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=RENDER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            max_tasks_per_child=JOBS_PER_WORKER,
+        )
+    return _pool
+
+
+def reset_pool():
+    """Drop a broken pool (a worker crashed) so the next render starts a fresh one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def submit(chart: str, *args, **kwargs) -> concurrent.futures.Future:
+    """
+    Queue a render. Arguments are the same plain data (DataFrames, dicts, strings)
+    the plotting_helper function takes; the future resolves to PNG bytes.
+    """
+    if chart not in CHARTS:
+        raise ValueError(f"Unknown chart type: {chart}")
+    try:
+        return get_pool().submit(_render, chart, args, kwargs)
+    except concurrent.futures.process.BrokenProcessPool:
+        logging.warning("Render pool was broken, restarting it")
+        reset_pool()
+        return get_pool().submit(_render, chart, args, kwargs)
+
+
+def warm():
+    """Start every worker now instead of on the first chart request."""
+    pool = get_pool()
+    for _ in range(RENDER_PROCESSES):
+        pool.submit(int)
@@ -0,0 +1,111 @@
+import os
+import heapq
+import asyncio
+import logging
+import multiprocessing
+import concurrent.futures
+from commands.helpers.quote_engine import BATCH_SIZE, chunked
+
+# Worker processes for sharded scans. Each pulls shards off the pool's queue,
+# fetches them and sends back only its best/worst rows.
+SCAN_PROCESSES = int(os.getenv("SCAN_PROCESSES", 4))
+SHARD_SIZE = int(os.getenv("SCAN_SHARD_SIZE", BATCH_SIZE))
+# rows kept at each end of every shard, enough for the largest top_n plus the refresh pass
+SHARD_KEEP = int(os.getenv("SCAN_SHARD_KEEP", 10))
+# universes at least this big go to the process pool, smaller ones scan in-process
+SHARD_MIN_TICKERS = int(os.getenv("SCAN_SHARD_MIN_TICKERS", 600))
+
+_pool = None
+
+
+def _pct(row):
+    return row[1]
+
+
+def _scan_shard(shard: list[str], min_market_cap: float, keep: int) -> tuple:
+    """
+    Worker side: fetch one shard and reduce it to its top/bottom `keep` rows
+    (every row when keep is None).
+
+    Returns:
+        tuple: (partial rows, tickers with data, tickers without data)
+    """
+    from commands.helpers.quote_engine import fetch_quotes
+    rows = fetch_quotes(shard)
+    ok = sum(1 for r in rows if r[1] is not None)
+    if keep is None:
+        return rows, ok, len(rows) - ok
+    usable = [r for r in rows if r[1] is not None and r[2] is not None and r[2] > min_market_cap]
+    partial = {r[0]: r for r in heapq.nlargest(keep, usable, key=_pct) + heapq.nsmallest(keep, usable, key=_pct)}
+    return list(partial.values()), ok, len(rows) - ok
+
+
+def merge_partials(partials: list[list[tuple]], keep: int = SHARD_KEEP) -> list[tuple]:
+    """
+    Merge per-shard top/bottom rows into the overall top/bottom `keep`, sorted by % change descending.
+    With keep=None the shards sent every row and they are returned as is.
+    """
+    rows = [r for part in partials for r in part]
+    if keep is None:
+        return rows
+    merged = {r[0]: r for r in heapq.nlargest(keep, rows, key=_pct) + heapq.nsmallest(keep, rows, key=_pct)}
+    return sorted(merged.values(), key=_pct, reverse=True)
+
+
+def get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn so workers never inherit the bot's event loop or sockets
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=SCAN_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def reset_pool():
+    """Drop a broken pool (a worker crashed) so the next scan starts a fresh one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def scan_sharded(tickers: list[str], min_market_cap: float = 1e9, keep: int = SHARD_KEEP,
+                       shard_size: int = SHARD_SIZE) -> list[tuple]:
+    """
+    Scan a universe across SCAN_PROCESSES worker processes.
+
+    The universe is cut into shards of `shard_size` tickers that idle workers pick
+    up one at a time, so adding tickers adds shards rather than time per worker.
+    Only each shard's top/bottom `keep` rows come back and are merged here;
+    keep=None sends back every row, for callers that keep the whole scan.
+
+    Returns:
+        List[tuple]: (ticker, pct_change, market_cap, volume) rows, the overall
+        top and bottom `keep` sorted by % change descending, or every row.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    shards = chunked(list(tickers), shard_size)
+    futures = [loop.run_in_executor(pool, _scan_shard, shard, min_market_cap, keep) for shard in shards]
+    try:
+        results = await asyncio.gather(*futures, return_exceptions=True)
+    except asyncio.CancelledError:
+        for f in futures:
+            f.cancel()
+        raise
+
+    partials, ok, missing = [], 0, 0
+    for shard, result in zip(shards, results):
+        if isinstance(result, concurrent.futures.process.BrokenProcessPool):
+            reset_pool()
+        if isinstance(result, Exception):
+            logging.warning(f"Scan shard of {len(shard)} tickers failed: {result}")
+            missing += len(shard)
+            continue
+        partials.append(result[0])
+        ok += result[1]
+        missing += result[2]
+    logging.info(f"Sharded scan: {len(shards)} shards, {ok} tickers with data, {missing} without")
+    return merge_partials(partials, keep)
@@ -0,0 +1,199 @@
+import os
+import re
+import time
+import pickle
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:      # Windows: no cross-process locks, single process mode only
+    fcntl = None
+
+# Sharded run mode: several bot processes, each owning some gateway shards.
+# SHARD_COUNT is the total, SHARD_IDS the comma-separated shards this process runs.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0)) or None
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS", "").split(",") if s.strip()] or None
+SHARDED = SHARD_COUNT is not None
+
+SHARED_DIR = os.getenv("SHARED_DIR", "shared")
+POLL_SECONDS = 0.5
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Exclusive lock across processes (flock on a side file), for appends/compaction of shared journals.
+    A single process has nobody to lock out, so outside sharded mode this does nothing (and creates no file).
+    """
+    if not SHARDED or fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def owns_guild(bot, guild_id: int) -> bool:
+    """Whether this process runs the shard a guild lives on (Discord's (guild_id >> 22) % shard_count)."""
+    if bot.shard_count is None or bot.shard_ids is None:
+        return True
+    return (guild_id >> 22) % bot.shard_count in bot.shard_ids
+
+
+class LeaderLock:
+    """
+    Elects one process as the scanner. The leader holds a non-blocking flock on a
+    file for as long as it lives; the OS drops it if the process dies, and the
+    next follower to call is_leader() takes over.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def is_leader(self) -> bool:
+        if not SHARDED or fcntl is None:
+            return True
+        with self._lock:
+            if self._file is not None:
+                return True
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            f = open(self._path, "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._file = f
+            logging.info(f"Process {os.getpid()} (shards {SHARD_IDS}) is now the scanner")
+            return True
+
+
+def _safe(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", key)
+
+
+class SharedStore:
+    """
+    Published objects shared by every bot process on the host, one pickle per key
+    under SHARED_DIR. Writers replace the file atomically (os.replace), readers
+    only unpickle again when the file changed.
+
+    Followers can also leave requests (e.g. "scan this universe") that the
+    leader picks up with take_requests().
+    """
+
+    def __init__(self, directory: str = SHARED_DIR):
+        self._dir = directory
+        self._cache = {}       # key -> ((mtime_ns, size), obj)
+
+    def _file(self, key: str, kind: str = "pkl") -> str:
+        return os.path.join(self._dir, f"{_safe(key)}.{kind}")
+
+    def _write(self, path: str, obj):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def publish(self, key: str, obj):
+        self._write(self._file(key), obj)
+
+    def get(self, key: str):
+        """Latest published object for key, or None."""
+        path = self._file(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            with open(path, "rb") as f:
+                obj = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            logging.warning(f"Could not read shared {key}: {e}")
+            return None
+        self._cache[key] = (version, obj)
+        return obj
+
+    def get_prefix(self, prefix: str) -> dict:
+        """{file key: object} for every published key starting with prefix."""
+        safe = _safe(prefix)
+        try:
+            names = [n[:-4] for n in os.listdir(self._dir) if n.startswith(safe) and n.endswith(".pkl")]
+        except FileNotFoundError:
+            return {}
+        # forget keys that were pruned, numbered keys would otherwise pile up in the cache
+        for key in [k for k in self._cache if _safe(k).startswith(safe) and _safe(k) not in names]:
+            del self._cache[key]
+        found = {}
+        for name in names:
+            obj = self.get(name)
+            if obj is not None:
+                found[name] = obj
+        return found
+
+    def prune(self, prefix: str, max_age: float):
+        """Delete published keys starting with prefix that are older than max_age seconds."""
+        safe = _safe(prefix)
+        cutoff = time.time() - max_age
+        try:
+            names = [n for n in os.listdir(self._dir) if n.startswith(safe) and n.endswith(".pkl")]
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self._dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    async def wait_for(self, key: str, accept, timeout: float):
+        """Poll until get(key) satisfies accept(obj), or return None after timeout seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            obj = await asyncio.to_thread(self.get, key)
+            if obj is not None and accept(obj):
+                return obj
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(POLL_SECONDS)
+
+    def request(self, key: str, payload):
+        """Ask the leader to produce `key`. Repeated requests for the same key collapse into one."""
+        self._write(os.path.join(self._dir, "requests", f"{_safe(key)}.pkl"), payload)
+
+    def take_requests(self) -> list:
+        """Leader side: pop every pending request payload."""
+        folder = os.path.join(self._dir, "requests")
+        try:
+            names = [n for n in os.listdir(folder) if n.endswith(".pkl")]
+        except FileNotFoundError:
+            return []
+        payloads = []
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                with open(path, "rb") as f:
+                    payloads.append(pickle.load(f))
+                os.remove(path)
+            except (OSError, EOFError, pickle.UnpicklingError) as e:
+                logging.warning(f"Dropping unreadable scan request {name}: {e}")
+        return payloads
+
+
+store = SharedStore()
+scanner = LeaderLock(os.path.join(SHARED_DIR, "scanner.lock"))
@@ -0,0 +1,22 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight coroutine.
+
+    Every caller awaiting do(key, ...) while a call for that key is running gets
+    the same result (or exception). The shared task is shielded, so a caller
+    that gets cancelled doesn't cancel the work for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
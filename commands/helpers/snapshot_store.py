@@ -0,0 +1,149 @@
+from __future__ import annotations
+import os
+import re
+import logging
+import threading
+from datetime import date, datetime
+from collections import OrderedDict
+from commands.helpers.lazy import lazy_import
+np = lazy_import("numpy")
+from commands.helpers.quote_snapshot import QuoteSnapshot, dtype
+from commands.helpers.market_calendar import calendar, EST
+
+SNAPSHOT_DIR = "snapshots"
+OPEN_FILES = 64      # memory maps kept open
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", name)
+
+
+class SnapshotStore:
+    """
+    Every scan's numeric snapshot as one .npy file:
+    snapshots/<session day>/<YYYYMMDDHHMMSS>_<universe>.npy. The folder is the
+    session the quotes belong to (market_calendar.quote_day), not the scan's
+    date, so a weekend scan lands with Friday's.
+
+    Files are written once and never modified, so a new scan is just a new file.
+    Rows are stored sorted by ticker and read back with np.load(mmap_mode="r"),
+    so looking a ticker up is a searchsorted over a memory map, not a full load.
+    """
+
+    def __init__(self, root: str = SNAPSHOT_DIR, open_files: int = OPEN_FILES):
+        self._root = root
+        self._open_files = open_files
+        self._maps = OrderedDict()     # path -> memmap
+        self._lock = threading.Lock()
+
+    def save(self, snapshot: QuoteSnapshot, universe: str, when: datetime = None) -> str:
+        """Write a snapshot, returns the file path."""
+        when = (when or datetime.now(EST)).astimezone(EST)
+        folder = os.path.join(self._root, calendar.quote_day(when).isoformat())
+        os.makedirs(folder, exist_ok=True)
+        # full timestamp, a folder can hold scans from several calendar days
+        path = os.path.join(folder, f"{when:%Y%m%d%H%M%S}_{_safe(universe)}.npy")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.sort(snapshot.data, order="ticker"))
+        os.replace(tmp, path)
+        return path
+
+    def days(self, universe: str = None) -> list[date]:
+        """Session days with at least one snapshot (of `universe`, if given), oldest first."""
+        try:
+            names = os.listdir(self._root)
+        except FileNotFoundError:
+            return []
+        out = []
+        for name in names:
+            try:
+                day = date.fromisoformat(name)
+            except ValueError:
+                continue
+            if universe is None or self._files(day, universe):
+                out.append(day)
+        return sorted(out)
+
+    def _files(self, day: date, universe: str) -> list[str]:
+        folder = os.path.join(self._root, day.isoformat())
+        suffix = f"_{_safe(universe)}.npy"
+        try:
+            return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(suffix))
+        except FileNotFoundError:
+            return []
+
+    def _open(self, path: str) -> np.ndarray:
+        with self._lock:
+            data = self._maps.get(path)
+            if data is not None:
+                self._maps.move_to_end(path)
+                return data
+        data = np.load(path, mmap_mode="r")
+        if data.dtype != dtype():
+            raise ValueError(f"{path} has dtype {data.dtype}, expected {dtype()}")
+        with self._lock:
+            self._maps[path] = data
+            while len(self._maps) > self._open_files:
+                self._maps.popitem(last=False)
+        return data
+
+    def load(self, day: date, universe: str = "sp500"):
+        """The day's last snapshot for a universe as a read-only memory-mapped array, or None."""
+        files = self._files(day, universe)
+        if not files:
+            return None
+        try:
+            return self._open(files[-1])
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read snapshot {files[-1]}: {e}")
+            return None
+
+    def movers(self, day: date, n: int = 5, universe: str = "sp500", min_market_cap: float = 1e9):
+        """The day's top/bottom n as a QuoteSnapshot over just those rows, or None if nothing was saved."""
+        data = self.load(day, universe)
+        if data is None:
+            return None
+        snap = QuoteSnapshot(np.asarray(data))
+        return QuoteSnapshot(snap.data[snap.extremes(n, min_market_cap)])
+
+    def lookup(self, day: date, ticker: str, universe: str = "sp500"):
+        """A ticker's % change in the day's last snapshot, or None."""
+        data = self.load(day, universe)
+        if data is None:
+            return None
+        tickers = data["ticker"]
+        i = int(np.searchsorted(tickers, ticker))
+        if i >= len(tickers) or tickers[i] != ticker:
+            return None
+        pct = float(data["pct"][i])
+        return None if np.isnan(pct) else pct
+
+    def iter_days(self, universe: str = "sp500", start: date = None, end: date = None):
+        """Yield (day, memory-mapped array) for every saved day in [start, end], for offline analysis."""
+        for day in self.days(universe):
+            if (start and day < start) or (end and day > end):
+                continue
+            data = self.load(day, universe)
+            if data is not None:
+                yield day, data
+
+    def streak(self, ticker: str, universe: str = "sp500", max_days: int = 250) -> list[tuple]:
+        """
+        The run of consecutive saved days, newest first, on which the ticker moved
+        the same direction as on the latest day. [(day, pct), ...], empty if unknown.
+        Only days with a snapshot of this universe count.
+        """
+        run = []
+        for day in reversed(self.days(universe)[-max_days:]):
+            pct = self.lookup(day, ticker, universe)
+            if pct is None:
+                # not scanned that day (or no data for the ticker), the run can't be verified past it
+                break
+            if run and (pct > 0) != (run[0][1] > 0):
+                break
+            run.append((day, pct))
+        return run
+
+
+store = SnapshotStore()
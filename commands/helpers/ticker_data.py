@@ -0,0 +1,125 @@
+from __future__ import annotations
+import os
+import time
+import threading
+from collections import OrderedDict
+from commands.helpers.lazy import lazy_import
+yf = lazy_import("yfinance")
+from commands.helpers.utility import normalize_ticker
+import commands.helpers.metrics as metrics
+
+# dataset -> (yf.Ticker attribute, seconds an answer stays good)
+DATASETS = {
+    "quarterly_income_stmt": ("quarterly_income_stmt", 6 * 60 * 60),   # only changes on earnings
+    "price_targets": ("analyst_price_targets", 15 * 60),                # carries the current price
+    "holders": ("major_holders", 24 * 60 * 60),
+    "info": ("info", 24 * 60 * 60),
+}
+NEGATIVE_TTL = float(os.getenv("TICKER_DATA_NEGATIVE_TTL", 60 * 60))    # remember unknown symbols this long
+MAX_ENTRIES = int(os.getenv("TICKER_DATA_ENTRIES", 512))
+WAIT_SECONDS = float(os.getenv("IO_TIMEOUT", 30))                       # how long a caller waits on someone else's fetch
+
+
+def _is_empty(value) -> bool:
+    """What yfinance hands back for a symbol it doesn't know: None, an empty frame, or a dict of Nones."""
+    if value is None:
+        return True
+    if getattr(value, "empty", False):
+        return True
+    if isinstance(value, dict):
+        return all(v is None for v in value.values())
+    return False
+
+
+class _Flight:
+    """One upstream fetch in progress; everyone asking for the same key waits on it."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TickerData:
+    """
+    Per-ticker Yahoo data shared by every command: an LRU of (dataset, ticker)
+    -> value with per-dataset TTLs. Concurrent requests for the same key make a
+    single upstream call (single-flight), and symbols Yahoo has nothing for are
+    cached as None for NEGATIVE_TTL so a typo can't be retried in a loop.
+
+    Values are shared between callers, treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()   # (dataset, ticker) -> (expires_at, value)
+        self._flights = {}              # (dataset, ticker) -> _Flight
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def get(self, dataset: str, ticker: str):
+        """
+        Cached or freshly fetched data for ticker, None if Yahoo has none.
+        Upstream errors are raised to every caller waiting on the fetch and are not cached.
+        """
+        attr, ttl = DATASETS[dataset]
+        key = (dataset, normalize_ticker(ticker))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits" if entry[1] is not None else "negative_hits"] += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            if not flight.done.wait(WAIT_SECONDS):
+                raise TimeoutError(f"Timed out waiting for {dataset} of {key[1]}")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            with metrics.upstream_seconds.time(kind=f"yf_{dataset}"):
+                value = getattr(yf.Ticker(key[1]), attr)
+            if _is_empty(value):
+                value, ttl = None, NEGATIVE_TTL
+            flight.value = value
+            self._store(key, value, ttl)
+            return value
+        except Exception as e:
+            metrics.record_upstream_error(f"yf_{dataset}", e)
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _store(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def hit_rate(self) -> float:
+        served = self.stats["hits"] + self.stats["negative_hits"] + self.stats["coalesced"]
+        total = served + self.stats["misses"]
+        return served / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+data = TickerData()
+metrics.add_collector(lambda: {f"bot_ticker_data_{k}": v for k, v in data.stats.items()})
@@ -0,0 +1,110 @@
+import os
+import json
+import logging
+import threading
+from typing import NamedTuple
+import commands.helpers.constituents as constituents
+from commands.helpers.utility import normalize_ticker
+from commands.helpers.shared_store import file_lock
+
+WATCHLIST_PATH = "watchlists.json"
+MAX_WATCHLISTS = int(os.getenv("MAX_WATCHLISTS", 20))          # per server
+MAX_WATCHLIST_SIZE = int(os.getenv("MAX_WATCHLIST_SIZE", 1000))  # tickers per list
+
+# index name -> ConstituentStore
+INDEXES = {
+    "sp500": constituents.sp500,
+    "nasdaq100": constituents.nasdaq100,
+    "russell1000": constituents.russell1000,
+}
+DEFAULT_UNIVERSE = "sp500"
+
+
+class Universe(NamedTuple):
+    name: str            # unique key, e.g. "sp500" or "watchlist:<guild>:<name>"
+    label: str           # display name, e.g. "S&P 500"
+    tickers: list
+
+
+class WatchlistStore:
+    """
+    Server-defined ticker lists, {guild_id: {name: [tickers]}}, saved to a JSON
+    file after every change (lists are small and change rarely).
+
+    Changes re-read the file under a file lock first, so bot processes sharing
+    it in sharded mode don't overwrite each other's servers.
+    """
+
+    def __init__(self, path: str = WATCHLIST_PATH):
+        self._path = path
+        self._lists = {}
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _reload(self):
+        try:
+            with open(self._path) as f:
+                self._lists = {int(g): lists for g, lists in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable watchlist file {self._path}: {e}")
+
+    def _save(self):
+        tmp = self._path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._lists, f)
+        os.replace(tmp, self._path)
+
+    def set(self, guild_id: int, name: str, tickers: list[str]) -> list[str]:
+        """Create or replace a list. Raises ValueError with a readable message on bad input."""
+        name = name.lower()
+        if name in INDEXES:
+            raise ValueError(f"`{name}` is a built-in universe, pick another name")
+        tickers = list(dict.fromkeys(normalize_ticker(t) for t in tickers if t.strip()))
+        if not tickers:
+            raise ValueError("A watchlist needs at least one ticker")
+        if len(tickers) > MAX_WATCHLIST_SIZE:
+            raise ValueError(f"Watchlists are limited to {MAX_WATCHLIST_SIZE} tickers")
+        with self._lock, file_lock(self._path + ".lock"):
+            self._reload()
+            lists = self._lists.setdefault(guild_id, {})
+            if name not in lists and len(lists) >= MAX_WATCHLISTS:
+                raise ValueError(f"This server already has {MAX_WATCHLISTS} watchlists")
+            lists[name] = tickers
+            self._save()
+        return tickers
+
+    def remove(self, guild_id: int, name: str) -> bool:
+        with self._lock, file_lock(self._path + ".lock"):
+            self._reload()
+            if self._lists.get(guild_id, {}).pop(name.lower(), None) is None:
+                return False
+            self._save()
+            return True
+
+    def get(self, guild_id: int, name: str):
+        return self._lists.get(guild_id, {}).get(name.lower())
+
+    def names(self, guild_id: int) -> list[str]:
+        return sorted(self._lists.get(guild_id, {}))
+
+
+watchlists = WatchlistStore()
+
+
+def resolve(name: str = DEFAULT_UNIVERSE, guild_id: int = None) -> Universe:
+    """
+    Look up a universe by name: a built-in index or one of the server's watchlists.
+    Index membership comes from the cached constituent snapshots (may block on the
+    very first fetch). Raises KeyError for unknown names.
+    """
+    name = (name or DEFAULT_UNIVERSE).lower()
+    store = INDEXES.get(name)
+    if store is not None:
+        return Universe(name, store.name, store.get())
+    tickers = watchlists.get(guild_id, name) if guild_id is not None else None
+    if tickers is None:
+        raise KeyError(name)
+    # watchlist names are only unique within a server
+    return Universe(f"watchlist:{guild_id}:{name}", name, list(tickers))
@@ -1,30 +1,9 @@
-import pandas_market_calendars as mcal
-from datetime import datetime
-import pytz
+from commands.helpers.alert_archive import archive
 
 ##################  Helper Functions  #################
-def log_alert(body: str):
-    now = datetime.now().strftime("%Y-%m-%d %H:%M UTC")
-    new_entry = f"{now} Alert:\n\n{body}\n\n{'-' * 40}\n"
-
-    try:
-        with open("alerts_archive.txt", "r") as f:
-            existing = f.read()
-    except FileNotFoundError:
-        existing = ""
-
-    with open("alerts_archive.txt", "w") as f:
-        f.write(new_entry + existing)
-
-def is_trading_day():
-    """
-    Check if today is a trading day (NYSE).
-    """
-    nyse = mcal.get_calendar('NYSE')
-    now = datetime.now(pytz.utc)  # Use UTC for pandas_market_calendars
-    today = now.date()
-    trading_days = nyse.valid_days(start_date=today, end_date=today)
-    return not trading_days.empty
+def log_alert(body: str, kind: str = "alert", **fields):
+    """Append an entry to the alert archive (see alert_archive.py)."""
+    archive.append(body, kind, **fields)
 
 # Formatters
 def format_percentage(v):
@@ -41,6 +20,14 @@ def format_large_num(v):
         return f"{v:.2f}"
     except:
         return "—"
-    
+
+def format_age(seconds: float) -> str:
+    """Human readable age like '42s ago' or '3m ago'."""
+    seconds = max(0, int(seconds))
+    if seconds < 5: return "just now"
+    if seconds < 60: return f"{seconds}s ago"
+    if seconds < 3600: return f"{seconds // 60}m {seconds % 60}s ago"
+    return f"{seconds // 3600}h {seconds % 3600 // 60}m ago"
+
 def normalize_ticker(t: str) -> str:
     return t.replace('.', '-').upper().strip()
\ No newline at end of file
@@ -1,33 +1,156 @@
+import os
 import time
-import pandas as pd
+import asyncio
+import logging
 import discord
 from discord.ext import commands
 import io
+from collections import deque
+from dataclasses import dataclass
 
 import commands.helpers.filter_gainers as filter_gainers
-import commands.helpers.gainer_multiThread as gainer_mt
+import commands.helpers.gainer_async as gainer_async
+import commands.helpers.quote_engine as quote_engine
 import commands.helpers.market_helper as mh
-import commands.helpers.plotting_helper as ph
+import commands.helpers.render_pool as render_pool
+import commands.helpers.scan_coordinator as scan_coordinator
+import commands.helpers.universes as universes
+import commands.helpers.snapshot_store as snapshot_store
+from commands.helpers.shared_store import SHARDED, store as shared, scanner
+from commands.helpers.metadata_cache import metadata
+from commands.helpers.quote_snapshot import QuoteSnapshot
+from commands.helpers.single_flight import SingleFlight
+from commands.helpers.executor import run_io, run_render
+from commands.helpers.channel_registry import IMAGE_PROFILES
+import commands.helpers.metrics as metrics
 
-from .helpers.utility import log_alert, format_large_num, format_percentage, normalize_ticker
+from .helpers.utility import log_alert, format_large_num, format_percentage, normalize_ticker, format_age
 
 
+metadata_lookups = metrics.counter("bot_metadata_lookups_total", "plot_top5 name/sector lookups by cache result")
+
+# How long a finished !top5 scan is reused before scanning again
+TOP5_CACHE_SECONDS = float(os.getenv("TOP5_CACHE_SECONDS", 120))
+MIN_MARKET_CAP = 1e9   # smaller names are left out of the movers table
+# Sharded mode: how long a follower waits for the scanner to answer a request
+SHARED_WAIT_SECONDS = float(os.getenv("SHARED_WAIT_SECONDS", 600))
+
+
+@dataclass
+class Top5Result:
+    png_bytes: bytes
+    elapsed: str                # "Time taken: ..." text for the scan
+    snapshot: QuoteSnapshot     # full numeric scan result
+    created_at: float           # time.time() when the quotes were fetched
+    universe: str = universes.DEFAULT_UNIVERSE
+    label: str = "S&P 500"
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
 
 ################ Commands  ################
 class MarketCommands(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._top5 = {}                 # universe name -> last Top5Result
+        self._top5_flight = SingleFlight()
+        self.scan_durations = deque(maxlen=10)  # seconds, for the alert loop's lead time
+        self._tasks = set()             # background tasks, referenced so they aren't garbage collected
+
+    def _spawn(self, coro, what: str):
+        """Run coro in the background, logging instead of losing its exception."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+
+        def done(t):
+            self._tasks.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                logging.warning(f"{what} failed: {t.exception()}")
+        task.add_done_callback(done)
+        return task
+
+    async def cog_load(self):
+        # nothing here may hold up connecting, the warm-up runs once the bot is ready
+        self._spawn(self._warm(), "Warm-up")
+
+    async def cog_unload(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _warm(self):
+        await self.bot.wait_until_ready()
+        render_pool.warm()
+        if SHARDED:
+            self._spawn(self._serve_scan_requests(), "Scan request loop")
+        if scanner.is_leader():
+            await self._prewarm_metadata()
+
+    async def _prewarm_metadata(self):
+        # Fill the name/sector cache for the whole universe in the background so plot_top5 never waits on .info
+        try:
+            tickers = await run_io(filter_gainers.getsp500)
+            metadata.prewarm(tickers)
+        except Exception as e:
+            logging.warning(f"Could not prewarm ticker metadata: {e}")
+
+    async def _serve_scan_requests(self):
+        """Sharded mode: while this process is the scanner, run the scans other processes ask for."""
+        was_leader = scanner.is_leader()
+        while True:
+            await asyncio.sleep(1)
+            if not scanner.is_leader():
+                continue
+            if not was_leader:
+                # took over from a scanner that went away, the metadata cache is ours to fill now
+                was_leader = True
+                self._spawn(self._prewarm_metadata(), "Metadata prewarm")
+            for universe in await asyncio.to_thread(shared.take_requests):
+                self._spawn(self._build_top5_png(universe=universe), f"Requested {universe.name} scan")
+
+    async def _publish(self, result: Top5Result):
+        if SHARDED:
+            try:
+                await run_io(shared.publish, f"top5:{result.universe}", result)
+            except Exception as e:
+                logging.warning(f"Could not publish {result.universe} top5: {e}")
+
+    async def _top5_from_scanner(self, universe: universes.Universe, max_age: float, fresh_after: float = None) -> Top5Result:
+        """
+        Sharded mode, follower side: use the scanner's published result, asking it
+        for a fresh scan if the last one is too old. Yahoo is only hit by the scanner.
+        fresh_after (epoch seconds) only accepts a result created after it.
+        """
+        key = f"top5:{universe.name}"
+        if fresh_after is None and max_age == 0:
+            # fresh quotes: a scan that finishes after this call
+            fresh_after = time.time()
+
+        def usable(r: Top5Result) -> bool:
+            return r.created_at >= fresh_after if fresh_after is not None else r.age <= max_age
+
+        result = await asyncio.to_thread(shared.get, key)
+        if result is None or not usable(result):
+            await asyncio.to_thread(shared.request, key, universe)
+            result = await shared.wait_for(key, usable, SHARED_WAIT_SECONDS)
+        if result is None:
+            raise asyncio.TimeoutError(f"No {universe.name} scan from the scanner process")
+        return result
 
     @commands.command(name='eps', help='Returns the EPS of a given ticker for the past five years. Example: `!eps AAPL`')
     async def eps(self, ctx, ticker: str):
         await ctx.send(f"Fetching Diluted EPS data for {ticker}")
-        df = mh.get_eps(ticker)
-        if df is not None:
-            image_buffer = ph.plot_eps(df, ticker)
-            file = discord.File(fp=image_buffer, filename="eps_chart.png")
-            await ctx.send(file=file)
-        else:
-            await ctx.send("Failed to retrieve EPS data.")
+        try:
+            df = await run_io(mh.get_eps, ticker)
+            if df is not None:
+                png_bytes = await run_render("eps", df, ticker)
+                file = discord.File(fp=io.BytesIO(png_bytes), filename="eps_chart.png")
+                await ctx.send(file=file)
+            else:
+                await ctx.send("Failed to retrieve EPS data.")
+        except asyncio.TimeoutError:
+            await ctx.send("Timed out fetching EPS data, try again in a bit.")
         
     # Error handling has to be done like this
     @eps.error
@@ -38,37 +161,161 @@ class MarketCommands(commands.Cog):
             # Handle other errors or raise
             raise error
         
-    async def _build_top5_png(self) -> tuple[bytes, str]:
-        """Compute top/bottom-5 table once and return (png_bytes, elapsed_text)."""
+    async def _scan_top5(self, universe: universes.Universe) -> Top5Result:
+        """Run the full-universe scan and render the table. Always hits Yahoo, use _build_top5_png."""
         start = time.time()
-        tickers = filter_gainers.getsp500()
+        tickers = universe.tickers
 
         # Using non-multithreaded for testing, has less issues with getting ticker info after
         #df = await ctx.bot.loop.run_in_executor(None, filter_gainers.getGainers, tickers)
 
         # Using multithreaded version for speed
-        df = await self.bot.loop.run_in_executor(None, gainer_mt.getGainers_mt, tickers)
+        #df = await self.bot.loop.run_in_executor(None, gainer_mt.getGainers_mt, tickers)
+
+        with metrics.span("top5:scan"):
+            if len(tickers) >= scan_coordinator.SHARD_MIN_TICKERS:
+                # big universes are sharded across worker processes; every row comes back
+                # since the snapshot (refresh pass, saved history, !streak) needs the whole universe
+                rows = await scan_coordinator.scan_sharded(tickers, keep=None)
+            else:
+                # asyncio version, bounded concurrency with per-request timeouts/retries on the bot's loop
+                rows = await gainer_async.scan_async(tickers)
+        snapshot = QuoteSnapshot.from_rows(rows)
+        try:
+            await run_io(snapshot_store.store.save, snapshot, universe.name)
+        except Exception as e:
+            logging.warning(f"Could not save {universe.name} snapshot: {e}")
+        created_at = time.time()
+
+        elapsed = f"Time taken: {(created_at - start):.2f} seconds."
+        metadata.prewarm(tickers)   # no-op unless entries are missing/stale
+        png_bytes = await self._render_top5(snapshot, universe.name, universe.label)
+        self.scan_durations.append(time.time() - start)
+        metrics.stage_seconds.observe(time.time() - start, stage="top5:total")
+
+        await run_io(log_alert, elapsed, "top5")
+        result = Top5Result(png_bytes, elapsed, snapshot, created_at, universe.name, universe.label)
+        await self._publish(result)
+        return result
+
+    async def _render_top5(self, snapshot: QuoteSnapshot, universe: str, label: str, n: int = 5, dpi: int = 300) -> bytes:
+        # the n biggest gainers and losers, only these rows become display strings
+        extremes = snapshot.to_frame(snapshot.extremes(n, MIN_MARKET_CAP))
+        combined_rows = filter_gainers.format_gainers(extremes, keep_numeric=True)
+
+        # names/sectors are looked up here so the render worker only gets plain data
+        meta = metadata.get_many(combined_rows['Tckr'].tolist())
+        if SHARDED and not all(meta.values()):
+            # the scanner process fills the shared database, pick up what it added since we loaded
+            await run_io(metadata.reload)
+            meta = metadata.get_many(combined_rows['Tckr'].tolist())
+        for entry in meta.values():
+            metadata_lookups.inc(result="hit" if entry else "miss")
+        # watchlist names are whatever the server picked, index labels read as "the S&P 500"
+        title = f"Top Movers in the {label}" if universe in universes.INDEXES else f"Top Movers in watchlist {label}"
+        return await run_render("top5", combined_rows, meta, dpi=dpi, title=title)
 
-        # get the first and last five rows
-        top_rows = df.head(5)
-        bottom_rows = df.tail(5)
-        combined_rows = pd.concat([top_rows, bottom_rows]).drop_duplicates()
+    async def _top5_variant(self, result: Top5Result, top_n: int = 5, profile: str = "standard") -> bytes:
+        """The table for a channel's top_n/profile settings, re-rendered from the cached snapshot if needed."""
+        dpi = IMAGE_PROFILES.get(profile, 300)
+        if top_n == 5 and dpi == 300:
+            return result.png_bytes
+        return await self._render_top5(result.snapshot, result.universe, result.label, top_n, dpi)
 
-        elapsed = f"Time taken: {(time.time() - start):.2f} seconds."
-        buf = ph.plot_top5(combined_rows)   # returns BytesIO
-        png_bytes = buf.getvalue()
-        buf.close()
+    async def _refresh_top5(self, result: Top5Result, n: int = 10) -> Top5Result:
+        """
+        Re-fetch only the n names at each end of the ranking and re-render.
+        Cheap enough to run seconds before the alert goes out.
+        """
+        edge = result.snapshot.tickers(result.snapshot.extremes(n, MIN_MARKET_CAP))
+        try:
+            fresh = await run_io(quote_engine.fetch_batch, edge)
+        except Exception as e:
+            logging.warning(f"Top5 refresh pass failed, keeping scan result: {e}")
+            return result
+        # the cached/published result keeps its snapshot, only the copy is updated;
+        # failed fetches keep their scan quote
+        snapshot = result.snapshot.copy()
+        refreshed_count = snapshot.update(fresh)
+        elapsed = f"{result.elapsed} Refreshed {refreshed_count} near the cutoff."
+        png_bytes = await self._render_top5(snapshot, result.universe, result.label)
+        refreshed = Top5Result(png_bytes, elapsed, snapshot, result.created_at, result.universe, result.label)
+        self._top5[result.universe] = refreshed
+        await self._publish(refreshed)
+        return refreshed
 
-        log_alert(elapsed)
-        return png_bytes, elapsed
+    async def _build_top5_png(self, max_age: float = TOP5_CACHE_SECONDS, universe: universes.Universe = None,
+                              fresh_after: float = None) -> Top5Result:
+        """
+        Return the top/bottom-5 table for a universe (the S&P 500 by default),
+        reusing a result up to max_age seconds old (or created after fresh_after,
+        epoch seconds, when given). Concurrent callers for the same universe share
+        one in-flight scan instead of each starting their own.
+        """
+        if universe is None:
+            universe = await run_io(universes.resolve)
+        cached = self._top5.get(universe.name)
+        if cached is not None and (cached.created_at >= fresh_after if fresh_after is not None else cached.age <= max_age):
+            return cached
+        if scanner.is_leader():
+            result = await self._top5_flight.do(f"top5:{universe.name}", self._scan_top5, universe)
+        else:
+            result = await self._top5_flight.do(f"top5:{universe.name}", self._top5_from_scanner, universe, max_age, fresh_after)
+        self._top5[universe.name] = result
+        return result
 
     @commands.command()
-    async def top5(self, ctx):
-        """Returns the current top 5 movers in the S&P 500."""
-        await ctx.send("Fetching current market data (this will take a few minutes)...")
-        png_bytes, elapsed = await self._build_top5_png()
-        file = discord.File(fp=io.BytesIO(png_bytes), filename="premkt_table.png")
-        await ctx.send(file=file)
+    async def top5(self, ctx, universe: str = universes.DEFAULT_UNIVERSE):
+        """Returns the current top 5 movers in the S&P 500, another index (nasdaq100, russell1000) or a watchlist."""
+        guild_id = ctx.guild.id if ctx.guild else None
+        try:
+            resolved = await run_io(universes.resolve, universe, guild_id)
+        except KeyError:
+            options = list(universes.INDEXES) + (universes.watchlists.names(guild_id) if guild_id else [])
+            await ctx.send(f"Unknown universe `{universe}`. Try one of: {', '.join(options)}")
+            return
+        cached = self._top5.get(resolved.name)
+        if cached is None or cached.age > TOP5_CACHE_SECONDS:
+            await ctx.send(f"Fetching current market data for {resolved.label} (this will take a few minutes)...")
+        result = await self._build_top5_png(universe=resolved)
+        file = discord.File(fp=io.BytesIO(result.png_bytes), filename="premkt_table.png")
+        with metrics.span("discord_upload"):
+            await ctx.send(content=f"`{result.label} quotes from {format_age(result.age)}`", file=file)
+
+    @commands.command(name='watchlist', help='Manages this server\'s watchlists for !top5. `!watchlist`, `!watchlist show <name>`, `!watchlist set <name> AAPL MSFT ...`, `!watchlist remove <name>`')
+    async def watchlist(self, ctx, action: str = None, name: str = None, *tickers: str):
+        """Server-defined ticker lists usable as a !top5 universe. Changing them needs administrator."""
+        if ctx.guild is None:
+            await ctx.send("Watchlists belong to a server, use this in a server channel.")
+            return
+        if action is None:
+            names = universes.watchlists.names(ctx.guild.id)
+            await ctx.send(f"Watchlists: {', '.join(names)}" if names else "No watchlists yet, create one with `!watchlist set <name> AAPL MSFT ...`")
+            return
+        if name is None:
+            await ctx.send("Please give the watchlist a name. Example: `!watchlist show tech`")
+            return
+
+        if action == "show":
+            tickers = universes.watchlists.get(ctx.guild.id, name)
+            await ctx.send(f"`{name}`: {' '.join(tickers)}"[:1900] if tickers else f"No watchlist named `{name}`.")
+            return
+        if action not in ("set", "remove"):
+            await ctx.send("Actions are show, set and remove.")
+            return
+        if not ctx.author.guild_permissions.administrator:
+            await ctx.send("Only administrators can change watchlists.")
+            return
+        if action == "remove":
+            removed = await asyncio.to_thread(universes.watchlists.remove, ctx.guild.id, name)
+            await ctx.send(f"Removed watchlist `{name}`." if removed else f"No watchlist named `{name}`.")
+            return
+        try:
+            saved = await asyncio.to_thread(universes.watchlists.set, ctx.guild.id, name, list(tickers))
+        except ValueError as e:
+            await ctx.send(str(e))
+            return
+        await ctx.send(f"Saved watchlist `{name.lower()}` with {len(saved)} tickers. Use it with `!top5 {name.lower()}`.")
 
 
 
@@ -85,26 +332,32 @@ class MarketCommands(commands.Cog):
             periods = 7
             await ctx.send("`periods` must be between 1 and 80. Testing with 1...")
 
-        df = mh.m2_data(periods) ##########
-        if df is not None and not df.empty:
-            # Send visualization
-            image_buffer = ph.plot_m2(df)
-            file = discord.File(fp=image_buffer, filename="m2_chart.png")
-            await ctx.send(file=file)
-        else:
-            await ctx.send("Failed to retrieve M2 Money Supply data.")
+        try:
+            df = await run_io(mh.m2_data, periods)
+            if df is not None and not df.empty:
+                # Send visualization
+                png_bytes = await run_render("m2", df)
+                file = discord.File(fp=io.BytesIO(png_bytes), filename="m2_chart.png")
+                await ctx.send(file=file)
+            else:
+                await ctx.send("Failed to retrieve M2 Money Supply data.")
+        except asyncio.TimeoutError:
+            await ctx.send("Timed out fetching M2 Money Supply data, try again in a bit.")
 
     @commands.command(name='price_targets', help='Fetches analyst price targets for a given ticker. Example: `!price_targets AAPL`')
     async def price_targets(self, ctx, ticker: str):
         ticker = normalize_ticker(ticker)
         await ctx.send(f"Fetching analyst price targets for {ticker}")
-        df = mh.get_price_targets(ticker) ##########
-        if df is not None:
-            buffer = ph.plot_price_targets(df)
-            file = discord.File(fp=buffer, filename="price_targets.png")
-            await ctx.send(file=file)
-        else:
-            await ctx.send("Failed to retrieve analyst price targets.")
+        try:
+            df = await run_io(mh.get_price_targets, ticker)
+            if df is not None:
+                png_bytes = await run_render("price_targets", df)
+                file = discord.File(fp=io.BytesIO(png_bytes), filename="price_targets.png")
+                await ctx.send(file=file)
+            else:
+                await ctx.send("Failed to retrieve analyst price targets.")
+        except asyncio.TimeoutError:
+            await ctx.send("Timed out fetching analyst price targets, try again in a bit.")
 
     
     @price_targets.error
@@ -119,12 +372,15 @@ class MarketCommands(commands.Cog):
     async def holders(self, ctx, ticker: str):
         ticker = normalize_ticker(ticker) 
         await ctx.send(f"Fetching major holders data for {ticker}")
-        df = mh.get_major_holders(ticker) ##########
-        if df is not None:
-            file = ph.plot_holders(df, ticker)
-            await ctx.send(file=discord.File(file, filename="major_holders.png"))
-        else:
-            await ctx.send("Failed to retrieve major holders data.")
+        try:
+            df = await run_io(mh.get_major_holders, ticker)
+            if df is not None:
+                png_bytes = await run_render("holders", df, ticker)
+                await ctx.send(file=discord.File(io.BytesIO(png_bytes), filename="major_holders.png"))
+            else:
+                await ctx.send("Failed to retrieve major holders data.")
+        except asyncio.TimeoutError:
+            await ctx.send("Timed out fetching major holders data, try again in a bit.")
 
     @holders.error
     async def holders_error(self, ctx, error):
@@ -138,13 +394,16 @@ class MarketCommands(commands.Cog):
     async def info(self, ctx, ticker: str):
         ticker = normalize_ticker(ticker) 
         await ctx.send(f"Fetching company info for {ticker}")
-        df, link = mh.get_info(ticker) ##########
-        if df is not None:
-            file = ph.plot_info(df)
-            await ctx.send(file=discord.File(file, filename="info.png"))
-            await ctx.send(link)
-        else:
-            await ctx.send("Failed to retrieve major holders data.")
+        try:
+            df, link = await run_io(mh.get_info, ticker)
+            if df is not None:
+                png_bytes = await run_render("info", df)
+                await ctx.send(file=discord.File(io.BytesIO(png_bytes), filename="info.png"))
+                await ctx.send(link)
+            else:
+                await ctx.send("Failed to retrieve major holders data.")
+        except asyncio.TimeoutError:
+            await ctx.send("Timed out fetching company info, try again in a bit.")
 
     @info.error
     async def info_error(self, ctx, error):
@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from discord.ext import commands
+
+import commands.helpers.filter_gainers as filter_gainers
+from .helpers.intraday_monitor import monitor
+from .helpers.market_calendar import calendar, EST
+from .helpers.channel_registry import registry
+from .helpers.delivery import deliver_all, log_results, summarize
+from .helpers.executor import run_io, submit_io
+from .helpers.shared_store import SHARDED, store as shared, scanner, owns_guild
+from .helpers.utility import log_alert, format_percentage, format_large_num
+from .alert_loop import _retryable
+import commands.helpers.metrics as metrics
+
+#################  Intraday Monitor Loop   #################
+
+INTRADAY_INTERVAL = float(os.getenv("INTRADAY_INTERVAL", 60))   # seconds between ticks
+INTRADAY_TICK_TIMEOUT = float(os.getenv("INTRADAY_TICK_TIMEOUT", 300))  # a full tick fetches ~500 symbols
+INTRADAY_START_TIMEOUT = float(os.getenv("INTRADAY_START_TIMEOUT", 600))  # previous closes + shares for the day
+MAX_LINES = 15     # crossings listed per message
+PUBLISHED_KEEP_SECONDS = 3600    # sharded mode: how long published batches stay around for late readers
+
+
+class MonitorCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._task = None
+        self._delivered_at = 0.0    # sharded mode: last published batch we sent
+        self._busy = None           # future of the start_day/tick running on the I/O pool
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self.monitor_loop())
+
+    async def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+
+    async def monitor_loop(self):
+        # the calendar pulls in pandas_market_calendars, leave that until after connecting
+        await self.bot.wait_until_ready()
+        while True:
+            now = datetime.now(EST)
+            session = await asyncio.to_thread(calendar.session, now.date())
+            if session is None or now >= session.close:
+                session = await asyncio.to_thread(calendar.next_session, now)
+            wait_time = (session.open - now).total_seconds()
+            if wait_time > 0:
+                logging.info(f"Intraday monitor sleeping {wait_time / 60:.2f} minutes until the {session.day} open")
+                await asyncio.sleep(wait_time)
+
+            try:
+                await self.run_session(session)
+            except Exception as e:
+                logging.error(f"Intraday monitor failed for {session.day}: {e}")
+                await asyncio.sleep(INTRADAY_INTERVAL)
+
+    async def run_session(self, session):
+        """Tick every INTRADAY_INTERVAL seconds until the close, alerting on threshold crossings."""
+        while datetime.now(EST) < session.close:
+            started = time.monotonic()
+            # nobody listening, don't spend any requests
+            if registry.subscribers("intraday"):
+                crossings = []
+                if scanner.is_leader():
+                    crossings = await self.tick(session)
+                if SHARDED:
+                    if crossings:
+                        # published counts as delivered, every process sends them to its own guilds
+                        await self.publish_crossings(crossings)
+                        monitor.commit(crossings)
+                    for batch in await self.published_crossings():
+                        await self.send_crossings(batch)
+                elif crossings and await self.send_crossings(crossings):
+                    # not committed when every send failed, so the next tick reports them again
+                    monitor.commit(crossings)
+            await asyncio.sleep(max(0, INTRADAY_INTERVAL - (time.monotonic() - started)))
+
+    async def tick(self, session):
+        if self._busy is not None and not self._busy.done():
+            logging.warning("Previous intraday tick or day start is still running, skipping this one")
+            return []
+        if monitor.day != session.day:
+            tickers = await run_io(filter_gainers.getsp500)
+            with metrics.span("intraday:start_day"):
+                await self._run(monitor.start_day, tickers, session.day, timeout=INTRADAY_START_TIMEOUT)
+        with metrics.span("intraday:tick"):
+            return await self._run(monitor.tick, timeout=INTRADAY_TICK_TIMEOUT)
+
+    async def _run(self, func, *args, timeout: float):
+        """Run func on the I/O pool, remembering the future so nothing new starts while it's still going."""
+        # keep the future: after a timeout the thread keeps going and the next call must see it
+        self._busy = submit_io(func, *args)
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self._busy)), timeout)
+
+    async def publish_crossings(self, crossings):
+        """Scanner side: one numbered key per batch, so a follower that reads late still finds every batch."""
+        at = time.time()
+        await run_io(shared.publish, f"intraday:{time.time_ns()}", {"at": at, "crossings": crossings})
+        await run_io(shared.prune, "intraday:", PUBLISHED_KEEP_SECONDS)
+
+    async def published_crossings(self) -> list[list]:
+        """Every published batch newer than the last one this process sent, oldest first."""
+        published = await asyncio.to_thread(shared.get_prefix, "intraday:")
+        batches = sorted((b for b in published.values() if b["at"] > self._delivered_at), key=lambda b: b["at"])
+        if not batches:
+            return []
+        first_look = self._delivered_at == 0.0
+        self._delivered_at = batches[-1]["at"]
+        if first_look:
+            # don't resend whatever was already published before this process started
+            batches = [b for b in batches if time.time() - b["at"] <= INTRADAY_INTERVAL]
+        return [b["crossings"] for b in batches]
+
+    async def send_crossings(self, crossings) -> bool:
+        """Post crossings to this process's intraday channels. False if every send failed."""
+        lines = [f"{c.ticker:<6} {format_percentage(c.pct):>8}  {format_large_num(c.market_cap):>8}"
+                 for c in crossings[:MAX_LINES]]
+        if len(crossings) > MAX_LINES:
+            lines.append(f"... and {len(crossings) - MAX_LINES} more")
+        pct = format_percentage(monitor.threshold)
+        header = f"**{datetime.now(EST):%H:%M} Intraday movers** (crossed a multiple of {pct})"
+        body = "\n".join(lines)
+
+        async def send(sub):
+            guild_id, channel_id, settings = sub
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                raise LookupError(f"Channel {channel_id} not found")
+            await channel.send(f"{header}\n```\n{body}\n```")
+
+        subscribers = [s for s in registry.subscribers("intraday") if owns_guild(self.bot, s[0])]
+        with metrics.span("intraday:fanout"):
+            results = await deliver_all(subscribers, send, retryable=_retryable)
+        for r in results:
+            metrics.deliveries.inc(outcome="ok" if r.ok else "failed")
+        log_results(results, "Intraday alert", describe=lambda sub: f"guild {sub[0]}, channel {sub[1]}")
+        await asyncio.to_thread(log_alert, f"{header}\n{body}\n{summarize(results)}", "intraday")
+        return not results or any(r.ok for r in results)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MonitorCog(bot))
@@ -0,0 +1,174 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from discord.ext import commands
+
+import commands.helpers.quote_engine as quote_engine
+from .helpers.price_alerts import book, DIRECTIONS
+from .helpers.market_calendar import calendar, EST
+from .helpers.delivery import deliver_all, log_results, DELIVERY_RETRIES
+from .helpers.executor import run_io
+from .helpers.utility import normalize_ticker
+from .helpers.shared_store import SHARDED, SHARD_IDS, store as shared, scanner
+from .alert_loop import _retryable
+import commands.helpers.metrics as metrics
+
+PRICE_ALERT_INTERVAL = float(os.getenv("PRICE_ALERT_INTERVAL", 60))   # seconds between evaluations
+CURRENT_PRICE_LOOKBACK = 5 * 24 * 60     # minutes of 1m bars to find the last trade when creating an alert, covers long weekends
+
+
+################ Commands  ################
+class PriceAlertCommands(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._task = None
+        self._prices_at = 0.0       # sharded mode: last published price batch evaluated
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self.evaluate_loop())
+
+    async def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+
+    @commands.command(name='alert', help='Alerts you when a stock crosses a price. Example: `!alert AAPL above 250`')
+    async def alert(self, ctx, ticker: str = None, direction: str = None, price: str = None):
+        """Adds a one-shot price alert, posted in this channel when it fires."""
+        if ticker is None or direction is None or price is None:
+            await ctx.send("Usage: `!alert <ticker> above|below <price>`")
+            return
+        try:
+            price = float(price.lstrip("$").replace(",", ""))
+        except ValueError:
+            await ctx.send("Price must be a number")
+            return
+        ticker, direction = normalize_ticker(ticker), direction.lower()
+        if direction not in DIRECTIONS:
+            await ctx.send(f"Direction must be one of: {', '.join(DIRECTIONS)}")
+            return
+        # an alert that already holds would just fire on the next check
+        try:
+            prices = await run_io(quote_engine.fetch_last_prices, [ticker], lookback_minutes=CURRENT_PRICE_LOOKBACK)
+            last = prices.get(ticker)
+        except Exception as e:
+            logging.warning(f"Could not check the current price of {ticker}: {e}")
+            last = None
+        if last is not None and (last >= price if direction == "above" else last <= price):
+            await ctx.send(f"{ticker} is already {direction} ${price:,.2f} (last ${last:,.2f})")
+            return
+        try:
+            alert = await asyncio.to_thread(book.add, ctx.author.id, ctx.channel.id, ticker, direction, price)
+        except ValueError as e:
+            await ctx.send(str(e))
+            return
+        await ctx.send(f"Alert #{alert.id} set: {alert.ticker} {alert.direction} ${alert.price:,.2f}")
+
+    @commands.command(name='alerts', help='Lists your active price alerts')
+    async def alerts(self, ctx):
+        alerts = book.for_user(ctx.author.id)
+        if not alerts:
+            await ctx.send("You have no active alerts. Add one with `!alert AAPL above 250`.")
+            return
+        lines = "\n".join(f"#{a.id:<6} {a.ticker:<6} {a.direction:<5} ${a.price:,.2f}" for a in alerts)
+        await ctx.send(f"```\n{lines}\n```")
+
+    @commands.command(name='unalert', help='Removes one of your price alerts by id, see `!alerts`')
+    async def unalert(self, ctx, alert_id: str = None):
+        try:
+            removed = await asyncio.to_thread(book.remove, ctx.author.id, int(alert_id.lstrip("#")))
+        except (ValueError, AttributeError):
+            await ctx.send("Usage: `!unalert <id>`, ids are listed by `!alerts`")
+            return
+        await ctx.send(f"Removed alert #{alert_id.lstrip('#')}." if removed else "You don't have an alert with that id.")
+
+    async def evaluate_loop(self):
+        # the calendar pulls in pandas_market_calendars, leave that until after connecting
+        await self.bot.wait_until_ready()
+        while True:
+            now = datetime.now(EST)
+            session = await asyncio.to_thread(calendar.session, now.date())
+            if session is None or now >= session.close:
+                session = await asyncio.to_thread(calendar.next_session, now)
+            wait_time = (session.open - now).total_seconds()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+
+            while datetime.now(EST) < session.close:
+                started = time.monotonic()
+                try:
+                    await self.evaluate()
+                except Exception as e:
+                    logging.error(f"Price alert evaluation failed: {e}")
+                await asyncio.sleep(max(0, PRICE_ALERT_INTERVAL - (time.monotonic() - started)))
+
+    async def _shared_prices(self, tickers: list[str]):
+        """
+        Sharded mode: every process publishes the tickers it has alerts on, the scanner
+        fetches the union once and publishes the prices. Returns a new price batch or None.
+        """
+        await run_io(shared.publish, f"price_watch:{'-'.join(map(str, SHARD_IDS or [0]))}", {"at": time.time(), "tickers": tickers})
+        if scanner.is_leader():
+            cutoff = time.time() - 5 * PRICE_ALERT_INTERVAL   # ignore processes that went away
+            watched = await run_io(shared.get_prefix, "price_watch:")
+            union = sorted({t for w in watched.values() if w["at"] >= cutoff for t in w["tickers"]})
+            if union:
+                with metrics.span("price_alerts:fetch"):
+                    prices = await run_io(quote_engine.fetch_last_prices, union)
+                await run_io(shared.publish, "prices", {"at": time.time(), "prices": prices})
+        batch = await asyncio.to_thread(shared.get, "prices")
+        if batch is None or batch["at"] <= self._prices_at:
+            return None
+        self._prices_at = batch["at"]
+        return {t: batch["prices"][t] for t in tickers if t in batch["prices"]}
+
+    async def evaluate(self):
+        """Fetch last prices for tickers that have alerts (in bulk) and post whatever fired."""
+        tickers = book.tickers()
+        if SHARDED:
+            prices = await self._shared_prices(tickers)
+            if not prices:
+                return
+        elif not tickers:
+            return
+        else:
+            with metrics.span("price_alerts:fetch"):
+                prices = await run_io(quote_engine.fetch_last_prices, tickers)
+        with metrics.span("price_alerts:match"):
+            fired = book.evaluate(prices)
+        if not fired:
+            return
+
+        by_channel = {}
+        for alert, price in fired:
+            by_channel.setdefault(alert.channel_id, []).append(
+                f"<@{alert.user_id}> {alert.ticker} is {alert.direction} ${alert.price:,.2f} (last ${price:,.2f}) [#{alert.id}]")
+
+        async def send(channel_id):
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                raise LookupError(f"Channel {channel_id} not found")
+            lines = by_channel[channel_id]
+            # stay under Discord's 2000 character limit
+            for i in range(0, len(lines), 15):
+                await channel.send("\n".join(lines[i:i + 15]))
+
+        results = await deliver_all(list(by_channel), send, retryable=_retryable)
+        delivered, failed = [], []
+        for r in results:
+            metrics.deliveries.inc(outcome="ok" if r.ok else "failed")
+            ids = [a.id for a, _ in fired if a.channel_id == r.target]
+            # gave up before using its retries = not retryable (channel gone, no permission), drop those
+            if r.ok or r.attempts <= DELIVERY_RETRIES:
+                delivered.extend(ids)
+            else:
+                failed.extend(ids)
+        await asyncio.to_thread(book.settle, delivered, failed)
+        if failed:
+            logging.warning(f"Re-armed {len(failed)} price alerts that couldn't be posted")
+        log_results(results, f"Price alerts ({len(fired)} fired)", describe=lambda c: f"channel {c}")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(PriceAlertCommands(bot))
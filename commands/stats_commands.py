@@ -0,0 +1,88 @@
+import os
+import time
+import asyncio
+import logging
+from aiohttp import web
+from discord.ext import commands
+
+import commands.helpers.metrics as metrics
+import commands.helpers.lazy as lazy
+from .helpers.render_cache import cache as render_cache
+from .helpers.ticker_data import data as ticker_data
+from .helpers.shared_store import SHARDED, SHARD_IDS
+
+# Prometheus endpoint, bound to localhost only. In sharded mode every process
+# serves its own numbers on METRICS_PORT + its lowest shard id, so they don't collide.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+if SHARDED and SHARD_IDS:
+    METRICS_PORT += min(SHARD_IDS)
+
+
+################ Commands  ################
+class StatsCommands(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._lag_task = None
+        self._runner = None
+
+    async def cog_load(self):
+        self._lag_task = asyncio.create_task(metrics.monitor_loop_lag())
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics_handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, METRICS_HOST, METRICS_PORT).start()
+            logging.info(f"Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            logging.warning(f"Could not start metrics endpoint on port {METRICS_PORT}: {e}")
+
+    async def cog_unload(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _metrics_handler(self, request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+    @commands.command(name='stats', help='Shows bot performance stats (admin only)')
+    @commands.has_permissions(administrator=True)
+    async def stats(self, ctx):
+        """Summary of stage timings, upstream errors, event-loop lag and cache hit rates."""
+        lines = [f"uptime: {(time.time() - metrics.START_TIME) / 3600:.1f}h"]
+
+        # summary()/snapshot() copy under the metrics lock, I/O threads keep adding series meanwhile
+        for _, count, p50, p99 in metrics.loop_lag.summary((0.5, 0.99)):
+            lines.append(f"event loop lag: p50 {p50 * 1e3:.1f}ms  p99 {p99 * 1e3:.1f}ms")
+
+        lines.append("")
+        lines.append(f"{'stage':<28}{'n':>6}{'p50':>9}{'p95':>9}")
+        for key, count, p50, p95 in metrics.stage_seconds.summary():
+            lines.append(f"{dict(key)['stage']:<28}{count:>6}{p50:>8.2f}s{p95:>8.2f}s")
+        for key, count, p50, p95 in metrics.upstream_seconds.summary():
+            lines.append(f"{'upstream:' + dict(key)['kind']:<28}{count:>6}{p50:>8.2f}s{p95:>8.2f}s")
+        for _, count, p50, p95 in metrics.ticker_fetch_seconds.summary():
+            lines.append(f"{'per ticker':<28}{count:>6}{p50:>8.3f}s{p95:>8.3f}s")
+
+        lines.append("")
+        lines.append(f"upstream errors: {metrics.upstream_errors.total():.0f}  "
+                     f"rate limited: {metrics.rate_limited.total():.0f}  "
+                     f"bad tickers: {metrics.ticker_errors.total():.0f}")
+        lines.append(f"render cache: {render_cache.hit_rate() * 100:.0f}% hits {render_cache.stats}")
+        lines.append(f"ticker data: {ticker_data.hit_rate() * 100:.0f}% served without a fetch, {len(ticker_data)} entries {ticker_data.stats}")
+        delivered = {dict(k).get('outcome'): v for k, v in metrics.deliveries.snapshot().items()}
+        if delivered:
+            lines.append(f"alert deliveries: {delivered.get('ok', 0):.0f} ok, {delivered.get('failed', 0):.0f} failed")
+
+        if lazy.import_times:
+            imports = ", ".join(f"{name} {t * 1e3:.0f}ms" for name, t in sorted(lazy.import_times.items(), key=lambda kv: -kv[1]))
+            lines.append(f"imports: {imports}")
+
+        text = "\n".join(lines)
+        await ctx.send(f"```\n{text[:1900]}\n```")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(StatsCommands(bot))
@@ -1,4 +1,6 @@
 import os
+import time
+import asyncio
 
 import discord
 from discord.ext import commands
@@ -10,25 +12,55 @@ logging.basicConfig(filename='log.txt', level=logging.INFO, format='%(asctime)s
 from dotenv import load_dotenv
 load_dotenv()
 
+import commands.helpers.lazy as lazy
+import commands.helpers.metrics as metrics
+import commands.helpers.shared_store as shared_store
+startup_seconds = metrics.gauge("bot_startup_seconds", "Time spent in each startup step")
+
 TOKEN = os.getenv("DISCORD_TOKEN")
 
 intents = discord.Intents.default()
 intents.message_content = True # Enable message content intent
 # intents = discord.Intents.all() # Alternatively, you can use all intents
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+if shared_store.SHARDED:
+    # one of several processes, each running SHARD_IDS out of SHARD_COUNT gateway shards
+    bot = commands.AutoShardedBot(command_prefix='!', intents=intents,
+                                  shard_count=shared_store.SHARD_COUNT, shard_ids=shared_store.SHARD_IDS)
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents)
+
+EXTENSIONS = [
+    "commands.alert_loop",
+    "commands.monitor_loop",
+    "commands.basic_commands",
+    "commands.market_commands",
+    "commands.price_alert_commands",
+    "commands.stats_commands",
+]
 
 @bot.event
 async def setup_hook():
-    # Load cogs/extensions
-    await bot.load_extension("commands.alert_loop")
-    await bot.load_extension("commands.basic_commands")
-    await bot.load_extension("commands.market_commands")
+    # Load cogs/extensions, timing each one. Heavy libraries (pandas, yfinance, ...)
+    # are lazy_import()ed by the helpers, so this is mostly our own code.
+    for ext in EXTENSIONS:
+        start = time.perf_counter()
+        await bot.load_extension(ext)
+        elapsed = time.perf_counter() - start
+        startup_seconds.set(elapsed, step=f"load:{ext}")
+        logging.info(f"Loaded {ext} in {elapsed * 1e3:.0f}ms")
 
 @bot.event
 async def on_ready():
-    logging.info(f'Starting bot as {bot.user}')
+    ready = time.time() - metrics.START_TIME
+    startup_seconds.set(ready, step="ready")
+    logging.info(f'Starting bot as {bot.user}, ready {ready:.2f}s after launch')
+    # Import what was deferred in the background so the first command doesn't pay for it.
+    # on_ready also fires after reconnects, warm() only does anything once.
+    asyncio.create_task(asyncio.to_thread(lazy.warm))
     # The alert loop is started by the AlertCog when the extension loads.
 
 
-bot.run(TOKEN)
+# Guarded so render_pool's spawned worker processes can import this module without starting the bot
+if __name__ == "__main__":
+    bot.run(TOKEN)